@@ -0,0 +1,152 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import sys
+import argparse
+
+from q2_mystery_stew.cli import (add_filter_arguments, get_filters,
+                                 add_output_argument, write_report)
+from q2_mystery_stew.generators import (PIPELINE_SHAPES,
+                                        VISUALIZER_SIZES,
+                                        INVOCATION_STRATEGIES)
+from q2_mystery_stew.runner import (run_examples, action_timings,
+                                    cache_timings)
+from q2_mystery_stew.sampling import (BudgetSampler, load_history,
+                                      SAFETY_MARGIN)
+from q2_mystery_stew.template import (OUTPUT_COLLECTION_SIZE, ECHO_MODES,
+                                      ECHO_FORMATS)
+
+
+def pair(value):
+    try:
+        first, second = (int(n) for n in value.split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'expected two ints separated by x, e.g. 2x3, not %r' % (value,))
+    return first, second
+
+
+def _format_pairs(pairs):
+    return ' '.join('%dx%d' % pair for pair in pairs)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m q2_mystery_stew',
+        description='Run the mystery-stew examples and report per-action '
+                    'timings as JSON.')
+
+    add_filter_arguments(parser)
+
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of worker processes')
+    parser.add_argument('--pool-dir', metavar='PATH',
+                        help='directory of shared pre-imported artifacts')
+    parser.add_argument('--cache-dir', metavar='PATH',
+                        help='run every example against a qiime2 Cache at '
+                             'PATH and report cache timings')
+    parser.add_argument('--scale', type=int, default=0,
+                        help='number of synthetic actions to add')
+    parser.add_argument('--pipeline-shape', type=pair, action='append',
+                        metavar='DEPTHxWIDTH',
+                        help='shape of a generated pipeline (may be '
+                             'repeated, default: %s)'
+                             % _format_pairs(PIPELINE_SHAPES))
+    parser.add_argument('--visualizer-size', type=pair, action='append',
+                        metavar='ASSETSxBYTES',
+                        help='number of assets and bytes per asset of a '
+                             'generated visualizer (may be repeated, '
+                             'default: %s)' % _format_pairs(VISUALIZER_SIZES))
+    parser.add_argument('--invocation-strategy',
+                        choices=INVOCATION_STRATEGIES, default='exhaustive',
+                        help="'covering' runs only enough examples to cover "
+                             "every t-wise interaction of the arguments "
+                             "passed to (or left out of) each action")
+    parser.add_argument('--strength', type=int, default=2,
+                        help='t of the covering strategy (default: 2, '
+                             'pairwise)')
+    parser.add_argument('--collection-size', type=int,
+                        default=OUTPUT_COLLECTION_SIZE,
+                        help='members per output collection')
+    parser.add_argument('--echo-mode', choices=ECHO_MODES, default='full')
+    parser.add_argument('--echo-format', choices=ECHO_FORMATS,
+                        default='lines')
+    add_output_argument(parser)
+
+    sampling = parser.add_argument_group(
+        'sampling', 'run a reproducible sample of the examples, stratified '
+                    'by filter, that fits in a time budget')
+    sampling.add_argument('--budget', type=float, metavar='SECONDS',
+                          help='wall-clock seconds the whole run may take')
+    sampling.add_argument('--seed', type=int, default=0,
+                          help='seed of the sample (default: 0)')
+    sampling.add_argument('--costs', metavar='PATH',
+                          help='an earlier JSON report, whose timings are '
+                               'used as the expected cost of each example '
+                               'and the fixed overhead of a run')
+    sampling.add_argument('--margin', type=float, default=SAFETY_MARGIN,
+                          help='fraction of the budget held back (default: '
+                               '%s)' % SAFETY_MARGIN)
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    filters = get_filters(args)
+
+    generation_options = dict(scale=args.scale,
+                              pipeline_shapes=(args.pipeline_shape
+                                               or PIPELINE_SHAPES),
+                              visualizer_sizes=(args.visualizer_size
+                                                or VISUALIZER_SIZES),
+                              **filters)
+
+    sampler = shards = None
+    categories = {}
+    if args.budget is not None:
+        costs, overhead = (load_history(args.costs) if args.costs
+                           else (None, 0.0))
+        sampler = BudgetSampler(args.budget, categories, costs, overhead,
+                                args.seed, args.workers, args.margin)
+        shards = sampler.shards
+
+    report = run_examples(workers=args.workers, pool_dir=args.pool_dir,
+                          select=sampler, categories=categories,
+                          shards=shards,
+                          cache_dir=args.cache_dir,
+                          invocation_strategy=args.invocation_strategy,
+                          strength=args.strength,
+                          collection_size=args.collection_size,
+                          echo_mode=args.echo_mode,
+                          echo_format=args.echo_format, **generation_options)
+
+    output = {
+        'filters': sorted(filters),
+        'workers': report['workers'],
+        'setup_time': report['setup_time'],
+        'wall_time': report['wall_time'],
+        'passed': report['passed'],
+        'failed': report['failed'],
+        'actions': action_timings(report),
+        'redundancy': report['redundancy'],
+        'failures': [r for r in report['examples']
+                     if r['status'] == 'failed'],
+    }
+
+    if args.cache_dir is not None:
+        output['cache'] = cache_timings(report)
+    if sampler is not None:
+        output['sample'] = sampler.summary
+
+    write_report(output, args.output)
+
+    return 1 if report['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""Timing benchmarks for building the plugin and running its examples
+
+Run with ``python -m q2_mystery_stew.benchmarks``. Results can be saved as
+JSON with ``--save`` and compared against a saved baseline with
+``--compare``, which exits non-zero when any benchmark's median regresses by
+more than ``--threshold``.
+"""
+
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+
+from qiime2.sdk import PluginManager, usage
+
+from q2_mystery_stew.plugin_setup import (create_plugin, register_test_method,
+                                          register_base_implementation,
+                                          new_plugin)
+from q2_mystery_stew.generators import (FILTERS, PipelineTemplate,
+                                        VisualizerTemplate,
+                                        generate_action_templates)
+from q2_mystery_stew.profiling import action_family, summarize
+
+SUITES = ('create_plugin', 'register_test_method', 'examples')
+
+
+def _time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def bench_create_plugin(repeat):
+    results = {}
+    for filter_ in sorted(FILTERS):
+        results[f'create_plugin.{filter_}'] = _time(
+            lambda: create_plugin(**{filter_: True}), repeat)
+    return results
+
+
+def bench_register_test_method(repeat):
+    families = defaultdict(list)
+    for template in generate_action_templates():
+        if isinstance(template, (PipelineTemplate, VisualizerTemplate)):
+            continue
+        families[action_family(template.action_id)].append(template)
+
+    results = {}
+    for family, templates in families.items():
+        def register_family():
+            plugin = new_plugin()
+            register_base_implementation(plugin)
+            for template in templates:
+                register_test_method(plugin, template)
+
+        results[f'register_test_method.{family}'] = _time(register_family,
+                                                          repeat)
+    return results
+
+
+def bench_examples(repeat):
+    plugin = create_plugin()
+    pm = PluginManager(add_plugins=False)
+    pm.add_plugin(plugin)
+
+    families = defaultdict(list)
+    for action in plugin.actions.values():
+        families[action_family(action.id)].extend(action.examples.values())
+
+    results = {}
+    for family, examples in families.items():
+        def run_family():
+            for example in examples:
+                example(usage.ExecutionUsage())
+
+        results[f'examples.{family}'] = _time(run_family, repeat)
+    return results
+
+
+def run_benchmarks(suites=SUITES, repeat=5):
+    benchmarks = {
+        'create_plugin': bench_create_plugin,
+        'register_test_method': bench_register_test_method,
+        'examples': bench_examples,
+    }
+    results = {}
+    for suite in suites:
+        results.update(benchmarks[suite](repeat))
+    return results
+
+
+def compare_results(results, baseline, threshold=0.1):
+    """Benchmarks whose median is more than `threshold` slower than baseline
+
+    Returns a dict of name -> ratio of the current to the baseline median.
+    """
+    regressions = {}
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        ratio = stats['median'] / baseline[name]['median']
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m q2_mystery_stew.benchmarks',
+        description='Benchmark plugin construction and example execution.')
+    parser.add_argument('--suite', action='append', choices=SUITES,
+                        help='suite to run (may be repeated, default: all)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of timed repetitions per benchmark')
+    parser.add_argument('--save', metavar='PATH',
+                        help='write the results to PATH as JSON')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='compare against a baseline saved with --save')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='allowed relative slowdown of the median')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.suite or SUITES, args.repeat)
+
+    for name, stats in results.items():
+        print('%-60s median %.4fs  min %.4fs  stdev %.4fs'
+              % (name, stats['median'], stats['min'], stats['stdev']))
+
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump(results, fh, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+        regressions = compare_results(results, baseline, args.threshold)
+        for name, ratio in regressions.items():
+            print('REGRESSION %s: %.2fx baseline median' % (name, ratio))
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
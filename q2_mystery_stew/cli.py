@@ -0,0 +1,43 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""Arguments and output shared by the command line entry points"""
+
+import sys
+import json
+
+from q2_mystery_stew.generators import FILTERS
+
+
+def add_filter_arguments(parser):
+    filters = parser.add_argument_group(
+        'filters', 'select action families (default: all but the stress '
+                   'filters), as with create_plugin')
+    for filter_ in sorted(FILTERS):
+        filters.add_argument('--' + filter_.replace('_', '-'), dest=filter_,
+                             action='store_true')
+
+
+def get_filters(args):
+    """The filters selected on the command line, as create_plugin takes"""
+    return {f: True for f in FILTERS if getattr(args, f)}
+
+
+def add_output_argument(parser):
+    parser.add_argument('--output', metavar='PATH',
+                        help='write the JSON report to PATH (default: '
+                             'stdout)')
+
+
+def write_report(report, path=None):
+    if path:
+        with open(path, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
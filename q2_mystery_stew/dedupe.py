@@ -0,0 +1,130 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from inspect import isfunction
+
+from q2_mystery_stew.generators.base import argument_key
+from q2_mystery_stew.usage import UsageInstantiator
+
+
+def invocation_key(arguments, parameter_specs):
+    """Identifies invocations passing the same inputs, under any names
+
+    Each argument (an input factory or a value) is paired with the view its
+    parameter takes, so equivalent invocations of different actions, which
+    mint their own parameter names, share a key.
+    """
+    return tuple(sorted(
+        (argument_key(arg), _view_key(parameter_specs[name].view_type))
+        for name, arg in arguments.items()))
+
+
+def input_preparations(arguments, parameter_specs):
+    """Every (input factory, view) an invocation has to prepare"""
+    return {(factory.__qualname__,
+             _view_key(parameter_specs[name].view_type))
+            for name, arg in arguments.items()
+            for factory in _factories([arg])}
+
+
+class InvocationIndex:
+    """Usage examples grouped by equivalent inputs, across actions
+
+    Examples in the same group pass the same inputs, viewed the same way,
+    whatever their parameters are called. Within an ArtifactPool each
+    (input factory, view) is prepared once however many examples use it
+    (see ArtifactPool.view), and `report` shows how many preparations that
+    saves. Examples without inputs to prepare are counted but not grouped.
+    """
+    def __init__(self):
+        self.examples = 0
+        self.groups = {}
+        self.preparations = {}
+
+    def add(self, action_id, example, arguments, parameter_specs):
+        self.examples += 1
+        preparations = input_preparations(arguments, parameter_specs)
+        if not preparations:
+            return
+
+        key = invocation_key(arguments, parameter_specs)
+        self.groups.setdefault(key, []).append((action_id, example))
+        for preparation in preparations:
+            self.preparations[preparation] = (
+                self.preparations.get(preparation, 0) + 1)
+
+    @classmethod
+    def from_templates(cls, templates):
+        index = cls()
+        for template in templates:
+            for idx, invocation in enumerate(template.invocation_domain):
+                index.add(template.action_id, f'example_{idx}',
+                          invocation.kwargs, template.parameter_specs)
+        return index
+
+    @classmethod
+    def from_plugin(cls, plugin, examples=None):
+        """Index the generated examples of `plugin` (or just `examples`)"""
+        if examples is None:
+            examples = [(action_id, name)
+                        for action_id, action in plugin.actions.items()
+                        for name in action.examples]
+        index = cls()
+        for action_id, name in examples:
+            example = plugin.actions[action_id].examples[name]
+            if isinstance(example, UsageInstantiator):
+                index.add(action_id, name, example.arguments,
+                          example.parameter_specs)
+        return index
+
+    def equivalent(self, arguments, parameter_specs):
+        """Every (action id, example) passing the same inputs"""
+        return list(self.groups.get(
+            invocation_key(arguments, parameter_specs), []))
+
+    def report(self, top=10):
+        """How many input preparations are repeated across the examples
+
+        The `top` largest groups of equivalent examples are listed, as are
+        the inputs prepared for more than one example.
+        """
+        with_inputs = sum(len(group) for group in self.groups.values())
+        preparations = sum(self.preparations.values())
+        saved = preparations - len(self.preparations)
+        largest = sorted(self.groups.values(), key=len, reverse=True)[:top]
+        return {
+            'examples': self.examples,
+            'examples_with_inputs': with_inputs,
+            'equivalent_examples': with_inputs - len(self.groups),
+            'preparations': preparations,
+            'unique_preparations': len(self.preparations),
+            'preparations_saved': saved,
+            'saved_fraction': saved / preparations if preparations else 0.0,
+            'largest_groups': [[list(example) for example in group]
+                               for group in largest if len(group) > 1],
+            'shared_inputs': {
+                '%s as %s' % preparation: uses
+                for preparation, uses in sorted(
+                    self.preparations.items(),
+                    key=lambda item: (-item[1], item[0]))
+                if uses > 1},
+        }
+
+
+def _view_key(view_type):
+    return getattr(view_type, '__qualname__', None) or repr(view_type)
+
+
+def _factories(arguments):
+    for arg in arguments:
+        if isfunction(arg):
+            yield arg
+        elif type(arg) in (list, tuple):
+            yield from _factories(arg)
+        elif type(arg) is dict:
+            yield from _factories(arg.values())
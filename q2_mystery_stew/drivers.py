@@ -0,0 +1,89 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import time
+
+from qiime2.sdk import ResultCollection, usage
+
+
+class CacheUsage(usage.ExecutionUsage):
+    """ExecutionUsage which round-trips every result through a qiime2 Cache
+
+    Each output is saved under its own key and loaded back, recording the
+    time spent inserting and looking up. The outputs are kept in `results`.
+    """
+    def __init__(self, cache, key_prefix):
+        super().__init__()
+        self.cache = cache
+        self.key_prefix = key_prefix
+        self.cache_timings = {'inserts': 0, 'insert': 0.0, 'lookup': 0.0}
+        self.results = []
+
+    def action(self, action, inputs, outputs):
+        variables = super().action(action, inputs, outputs)
+        for variable in variables:
+            self._round_trip(variable)
+        return variables
+
+    def _round_trip(self, variable):
+        value = variable.execute()
+        key = '%s_%s' % (self.key_prefix, variable.name)
+        if isinstance(value, ResultCollection):
+            save, load = self.cache.save_collection, self.cache.load_collection
+            self.results.extend(value.values())
+        else:
+            save, load = self.cache.save, self.cache.load
+            self.results.append(value)
+
+        start = time.perf_counter()
+        save(value, key)
+        self.cache_timings['insert'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        load(key)
+        self.cache_timings['lookup'] += time.perf_counter() - start
+
+        self.cache_timings['inserts'] += 1
+        self.cache.remove(key)
+
+
+def run_cached_example(example_f, cache, key_prefix, recycle=False):
+    """Run an example in a named, reusable pool of `cache`
+
+    The example executes its action with the cache as the backing store and
+    round-trips its outputs through the cache. Every output is then loaded
+    back out of the pool by its uuid, which is what reusing a pooled result
+    costs.
+
+    qiime2 only recycles pooled results for the steps of a pipeline, so with
+    `recycle` (for pipeline examples) the example is also run a second time
+    in the same pool, timing a run whose steps are recycled.
+    """
+    pool_key = key_prefix + '_pool'
+    with cache:
+        pool = cache.create_pool(key=pool_key, reuse=True)
+        with pool:
+            use = CacheUsage(cache, key_prefix)
+            start = time.perf_counter()
+            example_f(use)
+            first_run = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for result in use.results:
+                pool.load(str(result.uuid))
+            pool_load = time.perf_counter() - start
+
+            timings = dict(use.cache_timings, first_run=first_run,
+                           pool_loads=len(use.results), pool_load=pool_load)
+            if recycle:
+                start = time.perf_counter()
+                example_f(usage.ExecutionUsage())
+                timings['recycled_run'] = time.perf_counter() - start
+    cache.remove(pool_key)
+
+    return timings
@@ -6,15 +6,29 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
+from concurrent.futures import ProcessPoolExecutor
+
+from q2_mystery_stew.profiling import PhaseReport, measure
 from .primitive import (int_params, float_params, string_params, bool_params,
                         primitive_union_params)
 from .metadata import metadata_params
 from .artifacts import artifact_params
-from .collections import list_paramgen, collection_paramgen
+from .collections import (list_paramgen, collection_paramgen,
+                          large_collection_params)
 from .actions import (generate_single_type_methods,
                       generate_multiple_output_methods,
-                      generate_output_collection_methods)
-from .base import ParamTemplate, ActionTemplate, ParamSpec, Invocation
+                      generate_wide_output_methods,
+                      generate_output_collection_methods,
+                      generate_large_output_collection_methods,
+                      generate_interaction_methods)
+from .synthetic import generate_synthetic_methods
+from .pipelines import (generate_pipelines, generate_parallel_pipelines,
+                        PIPELINE_SHAPES, PARALLEL_WIDTHS)
+from .visualizers import generate_visualizers, VISUALIZER_SIZES
+from .covering import (apply_invocation_strategy, cover_invocations,
+                       INVOCATION_STRATEGIES)
+from .base import (ParamTemplate, ActionTemplate, ParamSpec, Invocation,
+                   PipelineTemplate, VisualizerTemplate)
 
 BASIC_GENERATORS = {
     'artifacts': artifact_params,
@@ -25,39 +39,228 @@ BASIC_GENERATORS = {
     'strings': string_params,
     'primitive_unions': primitive_union_params,
 }
+# Stress filters are opt-in: they are not selected when no filters are given
+STRESS_GENERATORS = {
+    'large_collections': large_collection_params,
+}
+STRESS_FILTERS = {*STRESS_GENERATORS.keys(), 'wide_outputs',
+                  'large_output_collections', 'parallel_pipelines',
+                  'interactions'}
 FILTERS = {*BASIC_GENERATORS.keys(), 'collections', 'typemaps', 'outputs',
-           'output_collections'}
+           'output_collections', 'pipelines', 'visualizers',
+           *STRESS_FILTERS}
 
 from .typemaps import generate_typemap_methods  # noqa: E402
 
 
 def get_param_generators(**filters):
-    selected_generators = []
+    return [_make_param_generator(kind, key)
+            for kind, key in _get_param_generator_units(filters)]
 
+
+def _get_param_generator_units(filters):
     def should_add(filter_):
         # no filters are set, so add all, or add if filter is True
         return not filters or filters.get(filter_, False)
 
     add_collections = should_add('collections')
+    selected = []
     lists = []
     collections = []
-    for key, generator in BASIC_GENERATORS.items():
+    for key in BASIC_GENERATORS:
         if should_add(key):
-            selected_generators.append(generator())
+            selected.append(('params', key))
             if add_collections and key != 'metadata':
-                lists.append(list_paramgen(generator()))
-                collections.append(collection_paramgen(generator()))
+                lists.append(('lists', key))
+                collections.append(('collections', key))
+
+    stress = [('params', key) for key in STRESS_GENERATORS
+              if filters.get(key, False)]
+
+    return selected + lists + collections + stress
+
+
+def _make_param_generator(kind, key):
+    generator = {**BASIC_GENERATORS, **STRESS_GENERATORS}[key]()
+    if kind == 'lists':
+        return list_paramgen(generator)
+    elif kind == 'collections':
+        return collection_paramgen(generator)
+    return generator
+
+
+SYNTHETIC_CHUNK_SIZE = 1000
+
+
+def _get_generation_units(filters, scale=0, pipeline_shapes=PIPELINE_SHAPES,
+                          visualizer_sizes=VISUALIZER_SIZES):
+    def should_add(filter_):
+        return not filters or filters.get(filter_, False)
+
+    units = []
+    if should_add('outputs'):
+        units.append(('outputs', None))
+    units.extend(_get_param_generator_units(filters))
+    if should_add('typemaps'):
+        units.append(('typemaps', None))
+    if should_add('output_collections'):
+        units.append(('output_collections', None))
+    if should_add('pipelines') and pipeline_shapes:
+        units.append(('pipelines', tuple(pipeline_shapes)))
+    if should_add('visualizers') and visualizer_sizes:
+        units.append(('visualizers', tuple(visualizer_sizes)))
+    if filters.get('wide_outputs', False):
+        units.append(('wide_outputs', None))
+    if filters.get('large_output_collections', False):
+        units.append(('large_output_collections', None))
+    if filters.get('parallel_pipelines', False):
+        units.append(('parallel_pipelines', None))
+    if filters.get('interactions', False):
+        units.append(('interactions', None))
+
+    # Split synthetic actions into chunks so they spread across workers
+    for start in range(0, scale, SYNTHETIC_CHUNK_SIZE):
+        units.append(('synthetic',
+                      (start, min(start + SYNTHETIC_CHUNK_SIZE, scale))))
+
+    return units
+
+
+def _get_unit_name(unit):
+    kind, key = unit
+    if kind == 'outputs':
+        return 'generate_multiple_output_methods'
+    elif kind == 'typemaps':
+        return 'generate_typemap_methods'
+    elif kind == 'output_collections':
+        return 'generate_output_collection_methods'
+    elif kind == 'wide_outputs':
+        return 'generate_wide_output_methods'
+    elif kind == 'large_output_collections':
+        return 'generate_large_output_collection_methods'
+    elif kind == 'pipelines':
+        return 'generate_pipelines'
+    elif kind == 'parallel_pipelines':
+        return 'generate_parallel_pipelines'
+    elif kind == 'visualizers':
+        return 'generate_visualizers'
+    elif kind == 'interactions':
+        return 'generate_interaction_methods'
+    elif kind == 'synthetic':
+        return 'generate_synthetic_methods'
+    return _make_param_generator(kind, key).__name__
+
+
+def _generate_unit(unit, filters):
+    kind, key = unit
+    if kind == 'outputs':
+        return list(generate_multiple_output_methods())
+    elif kind == 'typemaps':
+        return list(generate_typemap_methods(filters))
+    elif kind == 'output_collections':
+        return list(generate_output_collection_methods())
+    elif kind == 'wide_outputs':
+        return list(generate_wide_output_methods())
+    elif kind == 'large_output_collections':
+        return list(generate_large_output_collection_methods())
+    elif kind == 'pipelines':
+        return list(generate_pipelines(key))
+    elif kind == 'parallel_pipelines':
+        return list(generate_parallel_pipelines())
+    elif kind == 'visualizers':
+        return list(generate_visualizers(key))
+    elif kind == 'interactions':
+        return list(generate_interaction_methods())
+    elif kind == 'synthetic':
+        return list(generate_synthetic_methods(*key))
+    return list(generate_single_type_methods(_make_param_generator(kind, key)))
+
+
+def _get_unit_category(unit):
+    kind, key = unit
+    if kind == 'params':
+        return key
+    elif kind in ('lists', 'collections'):
+        return 'collections'
+    # the remaining kinds are named after their filter (or 'synthetic')
+    return kind
+
+
+def _measure_unit(unit, filters):
+    report = PhaseReport()
+    with report.phase(_get_unit_name(unit)):
+        templates = _generate_unit(unit, filters)
+    return templates, report.to_dict()
+
+
+def generate_action_templates(*, workers=None, report=None, scale=0,
+                              pipeline_shapes=PIPELINE_SHAPES,
+                              visualizer_sizes=VISUALIZER_SIZES,
+                              invocation_strategy='exhaustive', strength=2,
+                              **filters):
+    """Every action template selected by `filters`, in registration order
+
+    With `workers` > 1 the generators are run in a process pool. Results are
+    merged in the same order as a serial build, so action ids and ordering
+    do not depend on the number of workers. If a PhaseReport is provided,
+    each generator is recorded as its own phase.
+
+    `scale` appends that many synthetic actions (see
+    generate_synthetic_methods). `pipeline_shapes` sets the (depth, width)
+    of each generated pipeline and `visualizer_sizes` the (number of assets,
+    bytes per asset) of each generated visualizer. With the 'covering'
+    `invocation_strategy` each invocation domain is cut down to cover every
+    `strength`-wise interaction (see cover_invocations).
+
+    Each template's `category` is the filter that selected it. Actions
+    shared by several families (such as the relay methods of the pipelines)
+    belong to the first, as they are registered, and synthetic actions
+    belong to 'synthetic'.
+    """
+    units = _get_generation_units(filters, scale, pipeline_shapes,
+                                  visualizer_sizes)
+    unit_filters = [filters] * len(units)
+
+    if workers is None or workers <= 1:
+        results = list(map(_measure_unit, units, unit_filters))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_measure_unit, units, unit_filters))
+
+    templates = []
+    seen = set()
+    for unit, (unit_templates, phases) in zip(units, results):
+        category = _get_unit_category(unit)
+        for template in unit_templates:
+            # pipeline families share their relay methods
+            if template.action_id not in seen:
+                seen.add(template.action_id)
+                templates.append(template._replace(category=category))
+        if report is not None:
+            report.merge(phases)
 
-    selected_generators.extend(lists)
-    selected_generators.extend(collections)
+    if invocation_strategy != 'exhaustive':
+        with measure(report, 'cover_invocations'):
+            templates = apply_invocation_strategy(
+                templates, invocation_strategy, strength)
 
-    return selected_generators
+    return templates
 
 
 __all__ = ['int_params', 'float_params', 'string_params', 'bool_params',
            'primitive_union_params', 'metadata_params', 'artifact_params',
-           'list_paramgen', 'collection_paramgen',
+           'list_paramgen', 'collection_paramgen', 'large_collection_params',
            'generate_single_type_methods', 'generate_multiple_output_methods',
            'generate_output_collection_methods', 'generate_typemap_methods',
-           'BASIC_GENERATORS', 'FILTERS', 'get_param_generators',
-           'ParamTemplate', 'ParamSpec', 'ActionTemplate', 'Invocation']
+           'generate_wide_output_methods',
+           'generate_large_output_collection_methods',
+           'generate_interaction_methods', 'BASIC_GENERATORS',
+           'STRESS_GENERATORS', 'FILTERS',
+           'STRESS_FILTERS', 'get_param_generators',
+           'generate_action_templates', 'generate_synthetic_methods',
+           'generate_pipelines', 'generate_parallel_pipelines',
+           'PIPELINE_SHAPES', 'PARALLEL_WIDTHS', 'generate_visualizers',
+           'VISUALIZER_SIZES', 'ParamTemplate', 'ParamSpec', 'ActionTemplate',
+           'Invocation', 'PipelineTemplate', 'VisualizerTemplate',
+           'apply_invocation_strategy', 'cover_invocations',
+           'INVOCATION_STRATEGIES']
@@ -7,12 +7,15 @@
 # ----------------------------------------------------------------------------
 
 from collections import deque
+from itertools import product
 
 from qiime2.core.type import Collection
 from qiime2.sdk.util import is_metadata_type, is_semantic_type
 
 from q2_mystery_stew.type import EchoOutput
 from q2_mystery_stew.generators.base import ActionTemplate, Invocation
+from q2_mystery_stew.generators.primitive import (
+    int_params, float_params, bool_params, primitive_union_params)
 
 
 def generate_single_type_methods(generator):
@@ -74,6 +77,73 @@ def generate_multiple_output_methods():
                              invocation_domain=[Invocation({}, qiime_outputs)])
 
 
+WIDE_OUTPUT_COUNTS = (50, 100, 250, 500)
+
+
+def generate_wide_output_methods(output_counts=WIDE_OUTPUT_COUNTS):
+    for num_outputs in output_counts:
+        action_id = f'wide_outputs_{num_outputs}'
+
+        qiime_outputs = []
+        for idx in range(1, num_outputs+1):
+            qiime_outputs.append((f'output{idx}', EchoOutput))
+
+        yield ActionTemplate(action_id=action_id,
+                             parameter_specs={},
+                             registered_outputs=qiime_outputs,
+                             invocation_domain=[Invocation({}, qiime_outputs)])
+
+
+# Parameters crossed by the interaction methods, by base name, in order
+INTERACTION_PARAMS = ('single_int', 'boolean', 'single_float', 'auto_int')
+INTERACTION_PARAM_COUNTS = (3, 4)
+
+
+def generate_interaction_methods(param_counts=INTERACTION_PARAM_COUNTS):
+    """Methods passed every combination of their parameters' domains
+
+    `interactions_{n}` takes the first n of INTERACTION_PARAMS, so its
+    invocation domain grows multiplicatively with n. These are the domains
+    the 'covering' invocation strategy is meant to cut down.
+    """
+    templates = {param.base_name: param
+                 for generator in (int_params, bool_params, float_params,
+                                   primitive_union_params)
+                 for param in generator()}
+    params = [templates[name] for name in INTERACTION_PARAMS]
+    qiime_outputs = [('only_output', EchoOutput)]
+
+    for num_params in param_counts:
+        selected = params[:num_params]
+        specs = {}
+        for idx, param in enumerate(selected, 1):
+            spec = param.mint_spec(f'p{idx}_')
+            specs[spec.name] = spec
+
+        # USAGE: pass every combination of values in the domains
+        domain = [Invocation(dict(zip(specs, args)), qiime_outputs)
+                  for args in product(*(param.domain for param in selected))]
+
+        yield ActionTemplate(action_id=f'interactions_{num_params}',
+                             parameter_specs=specs,
+                             registered_outputs=qiime_outputs,
+                             invocation_domain=domain)
+
+
+LARGE_COLLECTION_SIZES = (10_000, 100_000)
+
+
+def generate_large_output_collection_methods(sizes=LARGE_COLLECTION_SIZES):
+    for size in sizes:
+        action_id = f'large_collection_{size}'
+        qiime_outputs = [('output', Collection[EchoOutput])]
+        yield ActionTemplate(action_id=action_id,
+                             parameter_specs={},
+                             registered_outputs=qiime_outputs,
+                             invocation_domain=[Invocation({}, qiime_outputs)],
+                             collection_size=size)
+
+
 def generate_output_collection_methods():
     action_id = 'collection_only'
     qiime_outputs = [('output', Collection[EchoOutput])]
@@ -97,3 +167,23 @@ def generate_output_collection_methods():
                          parameter_specs={},
                          registered_outputs=qiime_outputs,
                          invocation_domain=[Invocation({}, qiime_outputs)])
+
+    action_id = 'collection_third'
+    qiime_outputs = [('output1', EchoOutput),
+                     ('output2', EchoOutput),
+                     ('output_collection', Collection[EchoOutput])]
+    yield ActionTemplate(action_id=action_id,
+                         parameter_specs={},
+                         registered_outputs=qiime_outputs,
+                         invocation_domain=[Invocation({}, qiime_outputs)])
+
+    action_id = 'collection_interleaved'
+    qiime_outputs = [('output_collection1', Collection[EchoOutput]),
+                     ('output1', EchoOutput),
+                     ('output_collection2', Collection[EchoOutput]),
+                     ('output2', EchoOutput),
+                     ('output_collection3', Collection[EchoOutput])]
+    yield ActionTemplate(action_id=action_id,
+                         parameter_specs={},
+                         registered_outputs=qiime_outputs,
+                         invocation_domain=[Invocation({}, qiime_outputs)])
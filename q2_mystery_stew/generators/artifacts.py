@@ -10,45 +10,56 @@ import qiime2
 
 from q2_mystery_stew.type import SingleInt1, SingleInt2
 from q2_mystery_stew.format import SingleIntFormat
+from q2_mystery_stew.pool import pooled
 from q2_mystery_stew.generators.base import ParamTemplate
 
 
+@pooled
 def single_int1_1():
     return qiime2.Artifact.import_data('SingleInt1', 42)
 
 
+@pooled
 def single_int1_2():
     return qiime2.Artifact.import_data('SingleInt1', 43)
 
 
+@pooled
 def single_int1_3():
     return qiime2.Artifact.import_data('SingleInt1', 44)
 
 
+@pooled
 def single_int2_1():
     return qiime2.Artifact.import_data('SingleInt2', 2019)
 
 
+@pooled
 def single_int2_2():
     return qiime2.Artifact.import_data('SingleInt2', 2020)
 
 
+@pooled
 def single_int2_3():
     return qiime2.Artifact.import_data('SingleInt2', 2021)
 
 
+@pooled
 def wrapped_int1_1():
     return qiime2.Artifact.import_data('IntWrapper[WrappedInt1]', -10)
 
 
+@pooled
 def wrapped_int1_2():
     return qiime2.Artifact.import_data('IntWrapper[WrappedInt1]', -9)
 
 
+@pooled
 def wrapped_int2_1():
     return qiime2.Artifact.import_data('IntWrapper[WrappedInt1]', 0)
 
 
+@pooled
 def wrapped_int2_2():
     return qiime2.Artifact.import_data('IntWrapper[WrappedInt1]', -42)
 
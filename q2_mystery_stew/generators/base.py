@@ -5,7 +5,7 @@
 #
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
-from inspect import Parameter
+from inspect import Parameter, isfunction
 from collections import namedtuple
 
 
@@ -33,8 +33,50 @@ class ParamTemplate:
                          default)
 
 
+def argument_key(value):
+    """A hashable stand-in for an argument, factories compare by name"""
+    if isfunction(value):
+        return ('factory', value.__module__, value.__qualname__)
+    elif type(value) in (list, tuple):
+        return (type(value).__name__, tuple(map(argument_key, value)))
+    elif type(value) is dict:
+        return ('dict', tuple((key, argument_key(arg))
+                              for key, arg in value.items()))
+    return (type(value).__name__, repr(value))
+
+
 Invocation = namedtuple('Invocation', ['kwargs', 'expected_output_types'])
+# Every template also records the category (the filter) that generated it,
+# see generate_action_templates.
+# collection_size overrides the plugin-wide size of output collections, and
+# with simulate_work the method sleeps for its `duration` argument and also
+# echoes when it started and finished
 ActionTemplate = namedtuple('ActionTemplate', ['action_id',
                                                'parameter_specs',
                                                'registered_outputs',
-                                               'invocation_domain'])
+                                               'invocation_domain',
+                                               'collection_size',
+                                               'simulate_work',
+                                               'category'],
+                            defaults=[None, False, None])
+# A pipeline chaining the relay methods into `depth` rounds of fanning out to
+# `width` branches and back in again. With simulate_work each branch runs
+# echo_work, and the pipeline also returns the output of every branch.
+PipelineTemplate = namedtuple('PipelineTemplate', ['action_id',
+                                                   'parameter_specs',
+                                                   'registered_outputs',
+                                                   'invocation_domain',
+                                                   'depth',
+                                                   'width',
+                                                   'simulate_work',
+                                                   'category'],
+                              defaults=[False, None])
+# A visualizer writing an index.html linking `num_assets` text assets of
+# `asset_size` bytes each
+VisualizerTemplate = namedtuple('VisualizerTemplate', ['action_id',
+                                                       'parameter_specs',
+                                                       'invocation_domain',
+                                                       'num_assets',
+                                                       'asset_size',
+                                                       'category'],
+                                defaults=[None])
@@ -11,7 +11,13 @@ import itertools
 from qiime2.plugin import List, Collection
 from qiime2.core.type.util import is_semantic_type
 
+from q2_mystery_stew.type import SingleInt1
+from q2_mystery_stew.format import SingleIntFormat
 from q2_mystery_stew.generators.base import ParamTemplate
+from q2_mystery_stew.generators.artifacts import (single_int1_1, single_int1_2,
+                                                  single_int1_3)
+
+LARGE_COLLECTION_SIZES = (1_000, 5_000)
 
 
 def underpowered_set(iterable):
@@ -60,3 +66,16 @@ def collection_paramgen(generator):
                       for x in underpowered_set(param.domain)))
     make_collection.__name__ = 'collection_' + generator.__name__
     return make_collection()
+
+
+def large_collection_params(sizes=LARGE_COLLECTION_SIZES):
+    # Members cycle through a few factories, so a collection of thousands of
+    # members only needs a handful of imports
+    factories = (single_int1_1, single_int1_2, single_int1_3)
+    for size in sizes:
+        members = [factories[i % len(factories)] for i in range(size)]
+        yield ParamTemplate(f'many_ints_list_{size}', List[SingleInt1],
+                            SingleIntFormat, (members,))
+        yield ParamTemplate(f'many_ints_collection_{size}',
+                            Collection[SingleInt1], SingleIntFormat,
+                            ({str(k): v for k, v in enumerate(members)},))
@@ -0,0 +1,80 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from itertools import combinations
+
+from q2_mystery_stew.generators.base import argument_key
+
+# 'exhaustive' keeps every invocation, 'covering' only enough of them to
+# cover every t-wise interaction the exhaustive domain exercises
+INVOCATION_STRATEGIES = ('exhaustive', 'covering')
+
+
+def apply_invocation_strategy(templates, strategy='exhaustive', strength=2):
+    if strategy == 'exhaustive':
+        return list(templates)
+    return [template._replace(invocation_domain=cover_invocations(
+                template.invocation_domain, strength))
+            for template in templates]
+
+
+def cover_invocations(invocations, strength=2):
+    """The invocations needed to cover every `strength`-wise interaction
+
+    Every parameter is a factor whose levels are the arguments it is passed
+    (compared by argument_key), or being left out, so a default passed
+    explicitly is a different level from leaving it out. Every combination
+    of `strength` levels that appears in `invocations` is covered by the
+    result, which is built greedily (always taking the invocation covering
+    the most uncovered combinations) and keeps the original order. Every
+    argument is therefore kept at any strength, such as each member of a
+    union.
+
+    The expected outputs are a constraint rather than a factor: invocations
+    with different expected outputs are covered separately, so every output
+    branch is kept. Expected outputs are only known for the given
+    invocations, so the covering array is drawn from them rather than
+    constructed from scratch.
+    """
+    invocations = list(invocations)
+    branches = {}
+    for idx, invocation in enumerate(invocations):
+        branches.setdefault(argument_key(invocation.expected_output_types),
+                            []).append(idx)
+
+    selected = []
+    for indices in branches.values():
+        rows = _interactions([invocations[idx].kwargs for idx in indices],
+                             strength)
+        selected.extend(indices[idx] for idx in _greedy_cover(rows))
+
+    return [invocations[idx] for idx in sorted(selected)]
+
+
+def _interactions(arguments, strength):
+    factors = sorted({name for kwargs in arguments for name in kwargs})
+    strength = min(strength, len(factors))
+
+    rows = []
+    for kwargs in arguments:
+        levels = [(name, argument_key(kwargs[name]) if name in kwargs
+                   else None)
+                  for name in factors]
+        rows.append(set(combinations(levels, strength)))
+    return rows
+
+
+def _greedy_cover(rows):
+    uncovered = set().union(*rows)
+    selected = []
+    while uncovered:
+        best = max(range(len(rows)),
+                   key=lambda idx: (len(rows[idx] & uncovered), -idx))
+        selected.append(best)
+        uncovered -= rows[best]
+    return selected
@@ -11,9 +11,11 @@ import pandas as pd
 import qiime2
 from qiime2.plugin import Metadata, MetadataColumn, Categorical, Numeric
 
+from q2_mystery_stew.pool import pooled
 from q2_mystery_stew.generators.base import ParamTemplate
 
 
+@pooled
 def metadata1():
     df = pd.DataFrame({'col1': ['a', 'b', 'c'], 'col2': ['x', 'y', 'z']},
                       index=['id1', 'id2', 'id3'])
@@ -21,6 +23,7 @@ def metadata1():
     return qiime2.Metadata(df)
 
 
+@pooled
 def metadata2():
     df = pd.DataFrame({'col3': [1, 2, 3], 'col4': [0.1, 0.01, 0.001]},
                       index=['id1', 'id2', 'id3'])
@@ -28,10 +31,12 @@ def metadata2():
     return qiime2.Metadata(df)
 
 
+@pooled
 def artifact_cat():
     return qiime2.Artifact.import_data('BasicallyMetadata', metadata1())
 
 
+@pooled
 def artifact_num():
     return qiime2.Artifact.import_data('BasicallyMetadata', metadata2())
 
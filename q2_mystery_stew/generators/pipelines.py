@@ -0,0 +1,115 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from qiime2.plugin import Int, Float, Range
+
+from q2_mystery_stew.type import EchoOutput
+from q2_mystery_stew.format import EchoOutputFmt
+from q2_mystery_stew.generators.base import (ActionTemplate, Invocation,
+                                             ParamSpec, PipelineTemplate)
+
+# (depth, width) of each generated pipeline
+PIPELINE_SHAPES = ((1, 1), (1, 3), (2, 2), (3, 1))
+PIPELINE_SEED = 42
+# Branches of each parallel pipeline, and how long each branch sleeps in the
+# usage examples (a longer duration can be passed when measuring)
+PARALLEL_WIDTHS = (2, 4, 8, 16, 32)
+PARALLEL_EXAMPLE_DURATION = 0.01
+
+
+def generate_relay_methods(widths):
+    """Echo methods the pipelines are built from
+
+    echo_seed starts a chain from an int, echo_link passes an EchoOutput on,
+    and echo_fan_out_{width} and echo_fan_in_{width} split a chain into
+    `width` branches and join them again. They have no examples of their
+    own, as they are exercised by the pipelines.
+    """
+    def echo_inputs(num_inputs):
+        if num_inputs == 1:
+            names = ['input']
+        else:
+            names = [f'input{idx}' for idx in range(1, num_inputs + 1)]
+        return {name: ParamSpec(name, EchoOutput, EchoOutputFmt)
+                for name in names}
+
+    single_output = [('output', EchoOutput)]
+
+    yield ActionTemplate(
+        action_id='echo_seed',
+        parameter_specs={'seed': ParamSpec('seed', Int, int)},
+        registered_outputs=single_output,
+        invocation_domain=[])
+    yield ActionTemplate(action_id='echo_link',
+                         parameter_specs=echo_inputs(1),
+                         registered_outputs=single_output,
+                         invocation_domain=[])
+
+    for width in sorted(set(widths)):
+        yield ActionTemplate(
+            action_id=f'echo_fan_out_{width}',
+            parameter_specs=echo_inputs(1),
+            registered_outputs=[(f'output{idx}', EchoOutput)
+                                for idx in range(1, width + 1)],
+            invocation_domain=[])
+        yield ActionTemplate(action_id=f'echo_fan_in_{width}',
+                             parameter_specs=echo_inputs(width),
+                             registered_outputs=single_output,
+                             invocation_domain=[])
+
+
+def generate_pipelines(shapes=PIPELINE_SHAPES):
+    """The relay methods followed by a `pipeline_{depth}x{width}` per shape"""
+    yield from generate_relay_methods(width for _, width in shapes)
+
+    qiime_outputs = [('final', EchoOutput)]
+    for depth, width in shapes:
+        yield PipelineTemplate(
+            action_id=f'pipeline_{depth}x{width}',
+            parameter_specs={'seed': ParamSpec('seed', Int, int)},
+            registered_outputs=qiime_outputs,
+            invocation_domain=[Invocation({'seed': PIPELINE_SEED},
+                                          qiime_outputs)],
+            depth=depth,
+            width=width)
+
+
+def generate_parallel_pipelines(widths=PARALLEL_WIDTHS):
+    """A `parallel_{width}` pipeline per width, and the methods it runs
+
+    Each fans out to `width` branches of echo_work, which sleeps for the
+    pipeline's `duration` and echoes when it started and finished, so that
+    the branches can run side by side under a parallel configuration.
+    """
+    yield from generate_relay_methods(widths)
+
+    duration = ParamSpec('duration', Float % Range(0, None), float)
+    yield ActionTemplate(
+        action_id='echo_work',
+        parameter_specs={'input': ParamSpec('input', EchoOutput,
+                                            EchoOutputFmt),
+                         'duration': duration},
+        registered_outputs=[('output', EchoOutput)],
+        invocation_domain=[],
+        simulate_work=True)
+
+    for width in widths:
+        qiime_outputs = [('final', EchoOutput)]
+        qiime_outputs.extend((f'task{idx}', EchoOutput)
+                             for idx in range(1, width + 1))
+        kwargs = {'seed': PIPELINE_SEED,
+                  'duration': PARALLEL_EXAMPLE_DURATION}
+        yield PipelineTemplate(
+            action_id=f'parallel_{width}',
+            parameter_specs={'seed': ParamSpec('seed', Int, int),
+                             'duration': duration},
+            registered_outputs=qiime_outputs,
+            invocation_domain=[Invocation(kwargs, qiime_outputs)],
+            depth=1,
+            width=width,
+            simulate_work=True)
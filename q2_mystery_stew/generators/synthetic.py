@@ -0,0 +1,68 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import random
+
+from q2_mystery_stew.type import EchoOutput
+from q2_mystery_stew.generators.base import ActionTemplate, Invocation
+from q2_mystery_stew.generators.primitive import (
+    int_params, float_params, string_params, bool_params,
+    primitive_union_params)
+from q2_mystery_stew.generators.artifacts import artifact_params
+from q2_mystery_stew.generators.metadata import metadata_params
+
+MAX_SYNTHETIC_PARAMS = 6
+
+
+def _param_pool():
+    pool = []
+    for generator in (int_params, float_params, string_params, bool_params,
+                      primitive_union_params, artifact_params,
+                      metadata_params):
+        pool.extend(generator())
+    return pool
+
+
+def generate_synthetic_methods(start, stop, seed=0):
+    """Synthetic methods `synthetic_{start}` up to `synthetic_{stop - 1}`
+
+    Each action draws its parameters, defaults, and invocation from a random
+    state seeded by `seed` and its own index, so an action is identical no
+    matter how many others are generated alongside it.
+    """
+    pool = _param_pool()
+    qiime_outputs = [('output', EchoOutput)]
+
+    for idx in range(start, stop):
+        rng = random.Random(f'{seed}-{idx}')
+        num_params = rng.randint(1, MAX_SYNTHETIC_PARAMS)
+
+        required = {}
+        optional = {}
+        kwargs = {}
+        for param_idx, param in enumerate(rng.sample(pool, num_params)):
+            prefix = f'p{param_idx}_'
+            # roughly a third of the parameters are optional
+            if rng.random() < 1 / 3:
+                spec = param.mint_spec(prefix, default=None)
+                optional[spec.name] = spec
+                if rng.random() < 0.5:
+                    kwargs[spec.name] = rng.choice(param.domain)
+            else:
+                spec = param.mint_spec(prefix)
+                required[spec.name] = spec
+                kwargs[spec.name] = rng.choice(param.domain)
+
+        # parameters without a default must precede those with one
+        specs = {**required, **optional}
+
+        yield ActionTemplate(action_id=f'synthetic_{idx}',
+                             parameter_specs=specs,
+                             registered_outputs=qiime_outputs,
+                             invocation_domain=[Invocation(kwargs,
+                                                           qiime_outputs)])
@@ -0,0 +1,30 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+from qiime2.plugin import Int
+from qiime2.core.type import Visualization
+
+from q2_mystery_stew.generators.base import (Invocation, ParamSpec,
+                                             VisualizerTemplate)
+
+# (number of assets, bytes per asset) of each generated visualizer
+VISUALIZER_SIZES = ((0, 0), (10, 1_000), (100, 10_000))
+VISUALIZER_SEED = 42
+
+
+def generate_visualizers(sizes=VISUALIZER_SIZES):
+    """A `visualizer_{num_assets}x{asset_size}` per size"""
+    qiime_outputs = [('visualization', Visualization)]
+    for num_assets, asset_size in sizes:
+        yield VisualizerTemplate(
+            action_id=f'visualizer_{num_assets}x{asset_size}',
+            parameter_specs={'seed': ParamSpec('seed', Int, int)},
+            invocation_domain=[Invocation({'seed': VISUALIZER_SEED},
+                                          qiime_outputs)],
+            num_assets=num_assets,
+            asset_size=asset_size)
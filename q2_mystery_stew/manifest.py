@@ -0,0 +1,102 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+import warnings
+
+import qiime2
+
+import q2_mystery_stew
+from q2_mystery_stew.generators import generate_action_templates
+from q2_mystery_stew.profiling import measure
+
+# Bump whenever the pickled layout of the templates changes in a way the
+# package version would not reflect (e.g. during development).
+MANIFEST_FORMAT = 7
+MANIFEST_DIR_ENV = 'MYSTERY_STEW_MANIFEST_DIR'
+
+
+def manifest_key(filters, **options):
+    """Hash identifying a set of generated templates"""
+    payload = {
+        'format': MANIFEST_FORMAT,
+        'q2_mystery_stew': q2_mystery_stew.__version__,
+        'qiime2': qiime2.__version__,
+        'filters': sorted(filters.items()),
+        'options': sorted((k, repr(v)) for k, v in options.items()),
+    }
+    serialized = json.dumps(payload, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(serialized).hexdigest()
+
+
+def manifest_path(directory, key):
+    return os.path.join(directory, 'manifest-%s.pickle' % key)
+
+
+def load_manifest(directory, key):
+    """Return the cached templates for `key`, or None on a miss"""
+    path = manifest_path(directory, key)
+    try:
+        with open(path, 'rb') as fh:
+            manifest = pickle.load(fh)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        warnings.warn('Ignoring unreadable manifest %r: %s' % (path, e))
+        return None
+
+    if manifest.get('key') != key:
+        return None
+    return manifest['templates']
+
+
+def save_manifest(directory, key, templates):
+    os.makedirs(directory, exist_ok=True)
+    manifest = {'key': key, 'templates': templates}
+
+    # Write next to the destination and rename so concurrent workers never
+    # observe a partially written manifest.
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump(manifest, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, manifest_path(directory, key))
+    except Exception as e:
+        os.unlink(tmp_path)
+        warnings.warn('Unable to write manifest to %r: %s' % (directory, e))
+
+
+def get_action_templates(filters, directory=None, workers=None,
+                         report=None, **options):
+    """Generate the action templates, going through the manifest cache
+
+    The cache is used when `directory` is provided or the
+    MYSTERY_STEW_MANIFEST_DIR environment variable is set. `workers` and
+    `report` are passed on to generate_action_templates on a miss, along
+    with any other `options`, which also form part of the manifest key.
+    """
+    if directory is None:
+        directory = os.environ.get(MANIFEST_DIR_ENV)
+    if directory is None:
+        return generate_action_templates(workers=workers, report=report,
+                                         **options, **filters)
+
+    key = manifest_key(filters, **options)
+    with measure(report, 'load_manifest'):
+        templates = load_manifest(directory, key)
+    if templates is None:
+        templates = generate_action_templates(workers=workers, report=report,
+                                              **options, **filters)
+        with measure(report, 'save_manifest'):
+            save_manifest(directory, key, templates)
+
+    return templates
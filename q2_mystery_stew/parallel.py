@@ -0,0 +1,146 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""Scaling of the parallel pipelines under qiime2's parallel configuration
+
+Run with ``python -m q2_mystery_stew.parallel``. A ``parallel_{width}``
+pipeline is run with ``.parallel()`` on a local parsl thread pool once per
+``--workers`` count. Each run reports the scheduling overhead, the latency
+of each branch and the parallelism that was actually achieved.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from parsl.config import Config
+from parsl.executors import ThreadPoolExecutor
+from qiime2.sdk.parallel_config import ParallelConfig
+
+from q2_mystery_stew.cli import add_output_argument, write_report
+from q2_mystery_stew.format import EchoOutputFmt
+from q2_mystery_stew.generators import PARALLEL_WIDTHS
+from q2_mystery_stew.plugin_setup import create_plugin, activate_plugin
+from q2_mystery_stew.profiling import summarize
+
+
+def parsl_config(max_workers=None):
+    """A parsl Config with a single thread pool labelled 'default'
+
+    Only threads are used: parsl's process workers would need the generated
+    plugin installed to resolve the actions they are sent.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count()
+    return Config(executors=[ThreadPoolExecutor(label='default',
+                                                max_threads=max_workers)])
+
+
+def read_task_times(result):
+    """(started, finished) as echoed by an echo_work output"""
+    with result.view(EchoOutputFmt).open() as fh:
+        text = fh.read()
+
+    if text.startswith('{'):
+        entries = {name: value for name, (value, _)
+                   in json.loads(text).items()}
+    else:
+        entries = {name: value for name, value, _
+                   in map(json.loads, text.splitlines())}
+    return entries['started'], entries['finished']
+
+
+def task_metrics(submitted, wall_time, task_times):
+    """Scheduling and parallelism metrics of one pipeline run
+
+    `submitted` is when the pipeline was submitted and `task_times` holds
+    the (started, finished) wall clock times of each branch. The span is the
+    time from the first branch starting to the last one finishing, and the
+    scheduling overhead is the rest of the wall time. Achieved parallelism is
+    the average number of branches running during the span.
+    """
+    latencies = [finished - started for started, finished in task_times]
+    span = (max(finished for _, finished in task_times)
+            - min(started for started, _ in task_times))
+    return {
+        'tasks': len(task_times),
+        'wall_time': wall_time,
+        'span': span,
+        'scheduling_overhead': wall_time - span,
+        'achieved_parallelism': sum(latencies) / span if span else 0.0,
+        'task_latency': summarize(latencies),
+        'start_delay': summarize([started - submitted
+                                  for started, _ in task_times]),
+    }
+
+
+def run_parallel_pipeline(action, duration, max_workers=None, seed=42):
+    config = parsl_config(max_workers)
+    with ParallelConfig(parallel_config=config):
+        submitted = time.time()
+        results = action.parallel(seed=seed, duration=duration)._result()
+        wall_time = time.time() - submitted
+
+    # the first output is the joined result, the rest are the branches
+    task_times = [read_task_times(result) for result in results[1:]]
+    return task_metrics(submitted, wall_time, task_times)
+
+
+def scale_parallel_pipeline(width, workers=(1, 2, 4, 8), duration=0.5,
+                            **plugin_options):
+    """Run `parallel_{width}` once per number of workers
+
+    Each run is reported with its speedup over the first run.
+    """
+    if width not in PARALLEL_WIDTHS:
+        raise ValueError("width should be one of %r, not %r"
+                         % (PARALLEL_WIDTHS, width))
+    plugin = activate_plugin(create_plugin(lazy=True, parallel_pipelines=True,
+                                           **plugin_options))
+    action = plugin.actions[f'parallel_{width}']
+
+    runs = []
+    for max_workers in workers:
+        metrics = run_parallel_pipeline(action, duration, max_workers)
+        metrics['workers'] = max_workers
+        baseline = runs[0] if runs else metrics
+        metrics['speedup'] = baseline['wall_time'] / metrics['wall_time']
+        runs.append(metrics)
+
+    return {
+        'action': action.id,
+        'duration': duration,
+        'runs': runs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m q2_mystery_stew.parallel',
+        description='Run a parallel pipeline on a local executor with '
+                    'increasing numbers of workers.')
+    parser.add_argument('--width', type=int, choices=PARALLEL_WIDTHS,
+                        default=max(PARALLEL_WIDTHS),
+                        help='branches of the pipeline')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='worker counts to run')
+    parser.add_argument('--duration', type=float, default=0.5,
+                        help='seconds of work per branch')
+    add_output_argument(parser)
+    args = parser.parse_args(argv)
+
+    report = scale_parallel_pipeline(args.width, args.workers, args.duration)
+    write_report(report, args.output)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,6 +8,7 @@
 
 from inspect import Parameter
 
+import qiime2.sdk
 from qiime2.plugin import Plugin
 from qiime2.sdk.util import is_semantic_type
 
@@ -16,27 +17,128 @@ from q2_mystery_stew.type import (EchoOutput, SingleInt1, SingleInt2,
                                   IntWrapper, WrappedInt1, WrappedInt2,
                                   EchoOutputBranch1, EchoOutputBranch2,
                                   EchoOutputBranch3, BasicallyMetadata)
-from q2_mystery_stew.usage import UsageInstantiator
+from q2_mystery_stew.usage import (UsageInstantiator,
+                                   PipelineUsageInstantiator,
+                                   VisualizerUsageInstantiator)
 from q2_mystery_stew.format import (
     SingleIntFormat, SingleIntDirectoryFormat, EchoOutputFmt, EchoOutputDirFmt,
     MetadataLikeFormat, MetadataLikeDirectoryFormat)
-from q2_mystery_stew.template import get_disguised_echo_function
-from q2_mystery_stew.generators import (
-        get_param_generators, generate_single_type_methods,
-        generate_multiple_output_methods, generate_typemap_methods,
-        generate_output_collection_methods, FILTERS)
+from q2_mystery_stew.template import (get_disguised_echo_function,
+                                      get_pipeline_function,
+                                      get_visualizer_function,
+                                      OUTPUT_COLLECTION_SIZE, ECHO_MODES,
+                                      ECHO_FORMATS)
+from q2_mystery_stew.generators import (FILTERS, PIPELINE_SHAPES,
+                                        VISUALIZER_SIZES,
+                                        INVOCATION_STRATEGIES,
+                                        PipelineTemplate, VisualizerTemplate)
+from q2_mystery_stew.manifest import get_action_templates
+from q2_mystery_stew.pool import activate_pool
+from q2_mystery_stew.profiling import measure
 from q2_mystery_stew.transformers import (
     to_single_int_format, transform_from_metatadata, transform_to_metadata)
 
 
-def create_plugin(**filters):
+def create_plugin(*, lazy=False, manifest_dir=None, workers=None,
+                  report=None, categories=None, scale=0,
+                  collection_size=OUTPUT_COLLECTION_SIZE, echo_mode='full',
+                  echo_format='lines', pipeline_shapes=PIPELINE_SHAPES,
+                  visualizer_sizes=VISUALIZER_SIZES,
+                  invocation_strategy='exhaustive', strength=2, **filters):
     for filter_, val in filters.items():
         if filter_ not in FILTERS:
             raise ValueError("Unknown filter: %r" % (filter_,))
         if type(val) is not bool:
             raise ValueError("Value passed to %r should be True/False, not %r"
                              % (filter_, val))
-    plugin = Plugin(
+    plugin = new_plugin()
+
+    if lazy:
+        register = register_lazy_test_method
+    else:
+        register = register_test_method
+
+    with measure(report, 'register_base_implementation'):
+        register_base_implementation(plugin)
+
+    if type(scale) is not int or scale < 0:
+        raise ValueError("scale should be a non-negative int, not %r"
+                         % (scale,))
+    if type(collection_size) is not int or collection_size < 1:
+        raise ValueError("collection_size should be a positive int, not %r"
+                         % (collection_size,))
+    if echo_mode not in ECHO_MODES:
+        raise ValueError("echo_mode should be one of %r, not %r"
+                         % (ECHO_MODES, echo_mode))
+    if echo_format not in ECHO_FORMATS:
+        raise ValueError("echo_format should be one of %r, not %r"
+                         % (ECHO_FORMATS, echo_format))
+    if invocation_strategy not in INVOCATION_STRATEGIES:
+        raise ValueError("invocation_strategy should be one of %r, not %r"
+                         % (INVOCATION_STRATEGIES, invocation_strategy))
+    if type(strength) is not int or strength < 1:
+        raise ValueError("strength should be a positive int, not %r"
+                         % (strength,))
+    pipeline_shapes = _validate_pairs('pipeline_shapes', pipeline_shapes,
+                                      '(depth, width)', minimum=1)
+    visualizer_sizes = _validate_pairs('visualizer_sizes', visualizer_sizes,
+                                       '(number of assets, asset size)',
+                                       minimum=0)
+    options = dict(collection_size=collection_size, echo_mode=echo_mode,
+                   echo_format=echo_format)
+
+    action_templates = get_action_templates(filters, manifest_dir, workers,
+                                            report, scale=scale,
+                                            pipeline_shapes=pipeline_shapes,
+                                            visualizer_sizes=visualizer_sizes,
+                                            invocation_strategy=(
+                                                invocation_strategy),
+                                            strength=strength)
+    if categories is not None:
+        categories.update((template.action_id, template.category)
+                          for template in action_templates)
+    for action_template in action_templates:
+        if isinstance(action_template, PipelineTemplate):
+            register_action = register_test_pipeline
+        elif isinstance(action_template, VisualizerTemplate):
+            register_action = register_test_visualizer
+        else:
+            register_action = register
+        with measure(report, register_action.__name__):
+            register_action(plugin, action_template, **options)
+
+    return plugin
+
+
+def activate_plugin(plugin, pool=None):
+    """Register `plugin` with the plugin manager so its examples can run
+
+    If an ArtifactPool is given it becomes the active pool as well.
+    """
+    pm = qiime2.sdk.PluginManager(add_plugins=False)
+    pm.add_plugin(plugin)
+    if pool is not None:
+        activate_pool(pool)
+    return plugin
+
+
+def _validate_pairs(option, pairs, description, minimum):
+    validated = []
+    for pair in pairs:
+        if (len(pair) != 2
+                or any(type(n) is not int or n < minimum for n in pair)):
+            raise ValueError("%s should contain %s pairs of ints of at "
+                             "least %d, not %r"
+                             % (option, description, minimum, pair))
+        pair = tuple(pair)
+        # a repeated pair would register the same action twice
+        if pair not in validated:
+            validated.append(pair)
+    return tuple(validated)
+
+
+def new_plugin():
+    return Plugin(
                name='mystery-stew',
                project_name='q2-mystery-stew',
                version=q2_mystery_stew.__version__,
@@ -48,26 +150,6 @@ def create_plugin(**filters):
                                  'actions.'
              )
 
-    register_base_implementation(plugin)
-    if not filters or filters.get('outputs', False):
-        for action_template in generate_multiple_output_methods():
-            register_test_method(plugin, action_template)
-
-    selected_types = get_param_generators(**filters)
-    for generator in selected_types:
-        for action_template in generate_single_type_methods(generator):
-            register_test_method(plugin, action_template)
-
-    if not filters or filters.get('typemaps', False):
-        for action_template in generate_typemap_methods(filters):
-            register_test_method(plugin, action_template)
-
-    if not filters or filters.get('output_collections', False):
-        for action_template in generate_output_collection_methods():
-            register_test_method(plugin, action_template)
-
-    return plugin
-
 
 def register_base_implementation(plugin):
     plugin.register_semantic_types(SingleInt1, SingleInt2, IntWrapper,
@@ -97,9 +179,85 @@ def register_base_implementation(plugin):
     plugin.register_transformer(transform_from_metatadata)
 
 
-def register_test_method(plugin, action_template):
+def register_test_method(plugin, action_template,
+                         collection_size=OUTPUT_COLLECTION_SIZE,
+                         echo_mode='full', echo_format='lines'):
+    plugin.methods.register_function(**_get_method_registration(
+        action_template, collection_size, echo_mode, echo_format))
+
+
+def register_test_pipeline(plugin, pipeline_template,
+                           collection_size=OUTPUT_COLLECTION_SIZE,
+                           echo_mode='full', echo_format='lines'):
+    plugin.pipelines.register_function(**_get_pipeline_registration(
+        pipeline_template, collection_size, echo_mode, echo_format))
+
+
+def register_test_visualizer(plugin, visualizer_template,
+                             collection_size=OUTPUT_COLLECTION_SIZE,
+                             echo_mode='full', echo_format='lines'):
+    plugin.visualizers.register_function(**_get_visualizer_registration(
+        visualizer_template, collection_size, echo_mode, echo_format))
+
+
+def register_lazy_test_method(plugin, action_template, **options):
+    plugin.methods[action_template.action_id] = LazyMethod(
+        plugin, action_template, **options)
+
+
+class LazyMethod(qiime2.sdk.Method):
+    """A method which is only built when it is first used.
+
+    Only the id and name are set up front. On first access to anything else
+    the real method is registered in its place in ``plugin.methods``, and
+    this object is initialised from it just as an unpickled method is.
+    """
+    def __init__(self, plugin, action_template, **options):
+        # Action's own initialisation is deferred to _materialize
+        self._lazy_plugin = plugin
+        self._lazy_template = action_template
+        # passed through to register_test_method
+        self._lazy_options = options
+
+        self.id = action_template.action_id
+        self.name = action_template.action_id.replace("_", "-")
+
+    def _materialize(self):
+        plugin = self._lazy_plugin
+        register_test_method(plugin, self._lazy_template,
+                             **self._lazy_options)
+        method = dict.__getitem__(plugin.methods, self.id)
+        del self._lazy_plugin, self._lazy_template, self._lazy_options
+        self.__setstate__(method.__getstate__())
+
+    def __getattr__(self, attr):
+        # only reached for attributes the method does not have (yet)
+        if attr.startswith('__') or '_lazy_template' not in vars(self):
+            raise AttributeError(attr)
+        self._materialize()
+        return object.__getattribute__(self, attr)
+
+
+def _split_parameter_specs(parameter_specs):
     qiime_inputs = {}
     qiime_parameters = {}
+    for spec in parameter_specs.values():
+        if is_semantic_type(spec.qiime_type):
+            qiime_inputs[spec.name] = spec.qiime_type
+        else:
+            qiime_parameters[spec.name] = spec.qiime_type
+
+    return qiime_inputs, qiime_parameters
+
+
+def _get_method_registration(action_template,
+                             collection_size=OUTPUT_COLLECTION_SIZE,
+                             echo_mode='full', echo_format='lines'):
+    if action_template.collection_size is not None:
+        collection_size = action_template.collection_size
+
+    qiime_inputs, qiime_parameters = _split_parameter_specs(
+        action_template.parameter_specs)
     qiime_outputs = action_template.registered_outputs
 
     python_parameters = []
@@ -108,24 +266,28 @@ def register_test_method(plugin, action_template):
                                            Parameter.POSITIONAL_OR_KEYWORD,
                                            annotation=spec.view_type,
                                            default=spec.default))
-        if is_semantic_type(spec.qiime_type):
-            qiime_inputs[spec.name] = spec.qiime_type
-        else:
-            qiime_parameters[spec.name] = spec.qiime_type
 
     function = get_disguised_echo_function(id=action_template.action_id,
                                            python_parameters=python_parameters,
-                                           qiime_outputs=qiime_outputs)
+                                           qiime_outputs=qiime_outputs,
+                                           collection_size=collection_size,
+                                           echo_mode=echo_mode,
+                                           echo_format=echo_format,
+                                           simulate_work=(
+                                               action_template.simulate_work))
     usage_examples = {}
     for idx, invocation in enumerate(action_template.invocation_domain):
         usage_examples[f'example_{idx}'] = UsageInstantiator(
             id=action_template.action_id,
             parameter_specs=action_template.parameter_specs,
             arguments=invocation.kwargs,
-            expected_outputs=invocation.expected_output_types
+            expected_outputs=invocation.expected_output_types,
+            collection_size=collection_size,
+            echo_mode=echo_mode,
+            echo_format=echo_format
         )
 
-    plugin.methods.register_function(
+    return dict(
         function=function,
         inputs=qiime_inputs,
         parameters=qiime_parameters,
@@ -139,6 +301,81 @@ def register_test_method(plugin, action_template):
     )
 
 
+def _get_pipeline_registration(pipeline_template,
+                               collection_size=OUTPUT_COLLECTION_SIZE,
+                               echo_mode='full', echo_format='lines'):
+    qiime_inputs, qiime_parameters = _split_parameter_specs(
+        pipeline_template.parameter_specs)
+
+    function = get_pipeline_function(id=pipeline_template.action_id,
+                                     depth=pipeline_template.depth,
+                                     width=pipeline_template.width,
+                                     simulate_work=(
+                                         pipeline_template.simulate_work))
+    usage_examples = {}
+    for idx, invocation in enumerate(pipeline_template.invocation_domain):
+        usage_examples[f'example_{idx}'] = PipelineUsageInstantiator(
+            id=pipeline_template.action_id,
+            parameter_specs=pipeline_template.parameter_specs,
+            arguments=invocation.kwargs,
+            expected_outputs=invocation.expected_output_types,
+            collection_size=collection_size,
+            echo_mode=echo_mode,
+            echo_format=echo_format,
+            width=pipeline_template.width
+        )
+
+    return dict(
+        function=function,
+        inputs=qiime_inputs,
+        parameters=qiime_parameters,
+        outputs=pipeline_template.registered_outputs,
+        input_descriptions={},
+        parameter_descriptions={},
+        output_descriptions={},
+        name=pipeline_template.action_id.replace("_", "-"),
+        description=LOREM_IPSUM,
+        examples=usage_examples
+    )
+
+
+def _get_visualizer_registration(visualizer_template,
+                                 collection_size=OUTPUT_COLLECTION_SIZE,
+                                 echo_mode='full', echo_format='lines'):
+    qiime_inputs, qiime_parameters = _split_parameter_specs(
+        visualizer_template.parameter_specs)
+
+    function = get_visualizer_function(
+        id=visualizer_template.action_id,
+        num_assets=visualizer_template.num_assets,
+        asset_size=visualizer_template.asset_size,
+        echo_mode=echo_mode)
+    usage_examples = {}
+    for idx, invocation in enumerate(visualizer_template.invocation_domain):
+        usage_examples[f'example_{idx}'] = VisualizerUsageInstantiator(
+            id=visualizer_template.action_id,
+            parameter_specs=visualizer_template.parameter_specs,
+            arguments=invocation.kwargs,
+            expected_outputs=invocation.expected_output_types,
+            collection_size=collection_size,
+            echo_mode=echo_mode,
+            echo_format=echo_format,
+            num_assets=visualizer_template.num_assets,
+            asset_size=visualizer_template.asset_size
+        )
+
+    return dict(
+        function=function,
+        inputs=qiime_inputs,
+        parameters=qiime_parameters,
+        input_descriptions={},
+        parameter_descriptions={},
+        name=visualizer_template.action_id.replace("_", "-"),
+        description=LOREM_IPSUM,
+        examples=usage_examples
+    )
+
+
 LOREM_IPSUM = """
 Lorem ipsum dolor sit amet, consectetur adipiscing elit. Integer vel ipsum
 justo. Nulla a dolor tincidunt, lacinia libero sed, placerat odio. Vivamus
@@ -0,0 +1,155 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import hashlib
+import tempfile
+import functools
+import threading
+from contextlib import contextmanager
+
+import qiime2
+
+import q2_mystery_stew
+
+# Every factory decorated with @pooled, in definition order
+POOLED_FACTORIES = []
+
+_active_pool = None
+
+
+class ArtifactPool:
+    """Results of domain factories, created once and shared by every example
+
+    Results are keyed by the factory and a digest of its code, so a changed
+    factory never picks up a stale result. When a `directory` is given,
+    artifacts are also saved there as .qza files, and any process using the
+    same directory loads them instead of importing the data again. Views of
+    those results (see `view`) are shared the same way.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._results = {}
+        self._views = {}
+        # factories may call other pooled factories
+        self._lock = threading.RLock()
+        self.imports = 0
+        self.loads = 0
+        self.hits = 0
+        self.view_hits = 0
+
+    def get(self, factory):
+        key = factory_key(factory)
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                return self._results[key]
+
+            result = self._load(key)
+            if result is None:
+                result = factory.__wrapped__()
+                self.imports += 1
+                self._save(key, result)
+            else:
+                self.loads += 1
+
+            self._results[key] = result
+            return result
+
+    def view(self, factory, view_type):
+        """The result of `factory` viewed as `view_type`, shared read-only
+
+        Examples use these views only to compute expected values, so any
+        examples with the same input share its preparation.
+        """
+        key = (factory_key(factory), view_type)
+        with self._lock:
+            if key in self._views:
+                self.view_hits += 1
+                return self._views[key][1]
+
+            # the result is kept with its view, so the view stays valid
+            result = factory()
+            view = result.view(view_type)
+            self._views[key] = (result, view)
+            return view
+
+    def prepare(self, factories=None):
+        """Create (or load) the result of each factory up front"""
+        if factories is None:
+            factories = POOLED_FACTORIES
+        for factory in factories:
+            self.get(factory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.qza')
+
+    def _load(self, key):
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+        return qiime2.Artifact.load(self._path(key))
+
+    def _save(self, key, result):
+        # Only artifacts are persisted, metadata is kept in memory
+        if self.directory is None or not isinstance(result, qiime2.Artifact):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.qza')
+        os.close(fd)
+        try:
+            result.save(tmp_path)
+            # concurrent writers produce equivalent files, last one wins
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+
+@functools.lru_cache(maxsize=None)
+def factory_key(factory):
+    factory = getattr(factory, '__wrapped__', factory)
+    code = factory.__code__
+    digest = hashlib.sha256()
+    digest.update(q2_mystery_stew.__version__.encode('utf-8'))
+    digest.update(code.co_code)
+    digest.update(repr(code.co_consts).encode('utf-8'))
+    return '%s-%s' % (factory.__qualname__, digest.hexdigest()[:16])
+
+
+def pooled(factory):
+    """Route a domain factory through the active ArtifactPool, if any"""
+    @functools.wraps(factory)
+    def wrapper():
+        if _active_pool is None:
+            return factory()
+        return _active_pool.get(wrapper)
+
+    POOLED_FACTORIES.append(wrapper)
+    return wrapper
+
+
+def get_active_pool():
+    return _active_pool
+
+
+def activate_pool(pool):
+    global _active_pool
+    _active_pool = pool
+
+
+@contextmanager
+def artifact_pool(directory=None, pool=None):
+    """Activate an ArtifactPool (a new one by default) for the block"""
+    if pool is None:
+        pool = ArtifactPool(directory)
+    previous = get_active_pool()
+    activate_pool(pool)
+    try:
+        yield pool
+    finally:
+        activate_pool(previous)
@@ -0,0 +1,136 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import re
+import sys
+import json
+import time
+import statistics
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class PhaseReport:
+    """Wall time and allocation counts, accumulated per named phase
+
+    Each phase records how many times it was entered, the total wall time,
+    and the net change in allocated memory blocks. When ``tracemalloc`` is
+    tracing, the net change in traced bytes is recorded as well.
+    """
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            traced_before, _ = tracemalloc.get_traced_memory()
+        blocks_before = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = {
+                'calls': 1,
+                'wall_time': time.perf_counter() - start,
+                'allocated_blocks': sys.getallocatedblocks() - blocks_before,
+            }
+            if tracing:
+                traced_after, _ = tracemalloc.get_traced_memory()
+                stats['traced_bytes'] = traced_after - traced_before
+            self.add(name, stats)
+
+    def add(self, name, stats):
+        if name not in self.phases:
+            self.phases[name] = dict.fromkeys(stats, 0)
+        totals = self.phases[name]
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+
+    def merge(self, other):
+        for name, stats in other.items():
+            self.add(name, stats)
+
+    def to_dict(self):
+        return {name: dict(stats) for name, stats in self.phases.items()}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def measure(report, name):
+    """Time `name` into `report`, or do nothing if there is no report"""
+    if report is None:
+        return nullcontext()
+    return report.phase(name)
+
+
+# Callables receiving (action_id, phases) after every usage example
+_example_collectors = []
+
+
+class ExampleTimings:
+    """Collects the phase timings of every usage example run while active
+
+    Phases are 'materialize' (preparing inputs), 'action' (the use.action
+    call) and 'assert' (checking the outputs), in seconds. Visualizer
+    examples also record 'save' (writing the .qzv).
+    """
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, action_id, phases):
+        self.records.append({'action': action_id, 'phases': phases})
+
+    def totals(self):
+        totals = {}
+        for record in self.records:
+            for phase, duration in record['phases'].items():
+                totals[phase] = totals.get(phase, 0.0) + duration
+        return totals
+
+
+def add_example_collector(collector):
+    _example_collectors.append(collector)
+
+
+def remove_example_collector(collector):
+    _example_collectors.remove(collector)
+
+
+@contextmanager
+def collect_example_timings(collector=None):
+    if collector is None:
+        collector = ExampleTimings()
+    add_example_collector(collector)
+    try:
+        yield collector
+    finally:
+        remove_example_collector(collector)
+
+
+def report_example_timings(action_id, phases):
+    for collector in list(_example_collectors):
+        collector(action_id, phases)
+
+
+def action_family(action_id):
+    """Group numbered actions (e.g. int_params_1, int_params_2) together"""
+    return re.sub(r'_(\d+|defaults\d+)$', '', action_id)
+
+
+def summarize(timings):
+    """Summary statistics for a list of durations in seconds"""
+    return {
+        'repeat': len(timings),
+        'min': min(timings),
+        'max': max(timings),
+        'mean': statistics.mean(timings),
+        'median': statistics.median(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
@@ -0,0 +1,198 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import time
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from qiime2.sdk import usage
+from qiime2.core.cache import Cache
+
+from q2_mystery_stew.dedupe import InvocationIndex
+from q2_mystery_stew.drivers import run_cached_example
+from q2_mystery_stew.plugin_setup import create_plugin, activate_plugin
+from q2_mystery_stew.pool import ArtifactPool, activate_pool
+from q2_mystery_stew.profiling import action_family, collect_example_timings
+
+# Each worker gets several interleaved shards so that slow action families
+# are spread across the pool
+SHARDS_PER_WORKER = 4
+
+# The plugin built by each worker (or by the parent for a serial run), and
+# the cache examples run against, if any
+_plugin = None
+_cache = None
+
+
+def get_examples(plugin):
+    """Every (action id, example name) pair of the plugin, in order"""
+    examples = []
+    for action_id, action in plugin.actions.items():
+        for name in action.examples:
+            examples.append((action_id, name))
+    return examples
+
+
+def run_example(plugin, action_id, example, cache=None):
+    action = plugin.actions[action_id]
+    result = {
+        'action': action_id,
+        'example': example,
+        'family': action_family(action_id),
+        'status': 'passed',
+        'error': None,
+    }
+    example_f = action.examples[example]
+    start = time.perf_counter()
+    with collect_example_timings() as timings:
+        try:
+            if cache is None:
+                example_f(usage.ExecutionUsage())
+            else:
+                result['cache'] = run_cached_example(
+                    example_f, cache, '%s_%s' % (action_id, example),
+                    recycle=action.type == 'pipeline')
+        except Exception:
+            result['status'] = 'failed'
+            result['error'] = traceback.format_exc()
+    result['duration'] = time.perf_counter() - start
+    # Only the first run is reported, and a failed example may not have
+    # reached the end of every phase
+    result['phases'] = (timings.records[0]['phases'] if timings.records
+                        else {})
+
+    return result
+
+
+def _init_worker(plugin_options, pool_dir, cache_dir):
+    _activate(create_plugin(**plugin_options), pool_dir, cache_dir)
+
+
+def _activate(plugin, pool_dir, cache_dir):
+    global _plugin, _cache
+    _plugin = activate_plugin(plugin, ArtifactPool(pool_dir))
+    _cache = Cache(cache_dir) if cache_dir is not None else None
+
+
+def interleave_shards(examples, workers):
+    """Deal the examples into SHARDS_PER_WORKER shards per worker"""
+    num_shards = workers * SHARDS_PER_WORKER
+    return [examples[i::num_shards] for i in range(num_shards)]
+
+
+def _run_shard(shard_index, shard):
+    return [dict(run_example(_plugin, action_id, example, _cache),
+                 index=index, shard=shard_index)
+            for index, (action_id, example) in shard]
+
+
+def run_examples(workers=1, pool_dir=None, select=None, cache_dir=None,
+                 categories=None, shards=None, **plugin_options):
+    """Run the examples of the plugin built from `plugin_options`
+
+    The examples are sharded across `workers` processes, by default with
+    interleave_shards. `shards` can instead be a callable given the
+    examples and the number of workers, returning the examples of each
+    shard in the order they are run, such as a plan made for each worker
+    (see sampling.BudgetSampler). Shards are handed to whichever worker is
+    free, and every result records the shard it ran in. Each worker builds
+    the plugin once and shares the artifacts in `pool_dir` (a temporary
+    directory by default), which are imported once up front. `select` can
+    narrow the (action id, example name) pairs to run. With a `cache_dir`
+    every example runs against a qiime2 Cache there (see
+    drivers.run_cached_example). A `categories` dict is filled in before
+    `select` is called, as with create_plugin. Returns a report with one
+    entry per example, in plugin order, and how many of the examples repeat
+    an equivalent invocation (see dedupe.InvocationIndex). The setup time
+    is everything before the first example starts, apart from building the
+    plugin in each worker, which is part of the wall time.
+    """
+    setup_start = time.perf_counter()
+    plugin = create_plugin(categories=categories, **plugin_options)
+    examples = get_examples(plugin)
+    if select is not None:
+        examples = select(examples)
+    redundancy = InvocationIndex.from_plugin(plugin, examples).report()
+    indexed = list(enumerate(examples))
+    if shards is None:
+        shards = interleave_shards
+
+    with tempfile.TemporaryDirectory(prefix='mystery-stew-pool-') as tmp:
+        if pool_dir is None:
+            pool_dir = tmp
+        ArtifactPool(pool_dir).prepare()
+
+        start = time.perf_counter()
+        if workers <= 1:
+            _activate(plugin, pool_dir, cache_dir)
+            try:
+                results = _run_shard(0, indexed)
+            finally:
+                activate_pool(None)
+        else:
+            index = {example: idx for idx, example in indexed}
+            planned = [[(index[example], example) for example in shard]
+                       for shard in shards(examples, workers)]
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_worker,
+                                     initargs=(plugin_options, pool_dir,
+                                               cache_dir)) as executor:
+                results = [result for shard_results in
+                           executor.map(_run_shard, range(len(planned)),
+                                        planned)
+                           for result in shard_results]
+        wall_time = time.perf_counter() - start
+
+    results.sort(key=lambda result: result['index'])
+    for result in results:
+        del result['index']
+    return {
+        'workers': workers,
+        'setup_time': start - setup_start,
+        'wall_time': wall_time,
+        'passed': sum(r['status'] == 'passed' for r in results),
+        'failed': sum(r['status'] == 'failed' for r in results),
+        'examples': results,
+        'redundancy': redundancy,
+    }
+
+
+def action_timings(report):
+    """Per-action example counts and timings from a run_examples report"""
+    actions = {}
+    for result in report['examples']:
+        timing = actions.setdefault(result['action'], {
+            'family': result['family'],
+            'examples': 0,
+            'failed': 0,
+            'total': 0.0,
+            'max': 0.0,
+            'phases': {},
+        })
+        timing['examples'] += 1
+        timing['failed'] += result['status'] == 'failed'
+        timing['total'] += result['duration']
+        timing['max'] = max(timing['max'], result['duration'])
+        for phase, duration in result.get('phases', {}).items():
+            timing['phases'][phase] = (timing['phases'].get(phase, 0.0)
+                                       + duration)
+    return actions
+
+
+def cache_timings(report):
+    """Cache insert, lookup and pool load times summed per action family"""
+    families = {}
+    for result in report['examples']:
+        if 'cache' not in result:
+            continue
+        timing = families.setdefault(result['family'], {'examples': 0})
+        timing['examples'] += 1
+        for name, value in result['cache'].items():
+            timing[name] = timing.get(name, 0) + value
+    return families
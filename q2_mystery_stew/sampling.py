@@ -0,0 +1,209 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import json
+import random
+import statistics
+
+# Seconds assumed for an example when nothing like it has been timed
+DEFAULT_COST = 1.0
+# Fraction of each worker's share of the budget held back, as examples are
+# not packed onto workers exactly as estimated and their costs vary
+SAFETY_MARGIN = 0.1
+
+
+def load_history(path):
+    """Seconds per example of each action, and the fixed overhead of a run
+
+    Either the JSON written by ``python -m q2_mystery_stew`` or a
+    run_examples report (with every example's duration) can be used. The
+    overhead is the setup time plus the wall time not spent in examples
+    (starting workers, building the plugin in each), assuming the examples
+    were spread evenly across the workers.
+    """
+    with open(path) as fh:
+        report = json.load(fh)
+
+    if 'examples' in report:
+        durations = {}
+        for result in report['examples']:
+            durations.setdefault(result['action'], []).append(
+                result['duration'])
+        costs = {action_id: statistics.mean(values)
+                 for action_id, values in durations.items()}
+        total = sum(sum(values) for values in durations.values())
+    else:
+        costs = {action_id: timing['total'] / timing['examples']
+                 for action_id, timing in report['actions'].items()
+                 if timing['examples']}
+        total = sum(timing['total'] for timing in report['actions'].values())
+
+    overhead = 0.0
+    if 'wall_time' in report:
+        overhead = max(0.0, report.get('setup_time', 0.0)
+                       + report['wall_time']
+                       - total / report.get('workers', 1))
+    return costs, overhead
+
+
+def estimate_costs(examples, categories, costs):
+    """The expected seconds of each (action id, example name) pair
+
+    Actions without a recorded cost are assumed to cost the mean of their
+    category, or else the median of every recorded cost.
+    """
+    by_category = {}
+    for action_id, cost in costs.items():
+        if action_id in categories:
+            by_category.setdefault(categories[action_id], []).append(cost)
+    fallback = statistics.median(costs.values()) if costs else DEFAULT_COST
+
+    estimates = []
+    for action_id, _ in examples:
+        if action_id in costs:
+            estimates.append(costs[action_id])
+        elif categories.get(action_id) in by_category:
+            estimates.append(
+                statistics.mean(by_category[categories[action_id]]))
+        else:
+            estimates.append(fallback)
+    return estimates
+
+
+def worker_capacity(budget, overhead=0.0, margin=SAFETY_MARGIN):
+    """Seconds each worker may spend on examples within `budget`"""
+    if overhead >= budget:
+        raise ValueError("a budget of %rs does not cover the %.1fs of "
+                         "overhead measured for a run" % (budget, overhead))
+    return (budget - overhead) * (1 - margin)
+
+
+def sample_examples(examples, categories, costs, budget, seed=0, workers=1,
+                    overhead=0.0, margin=SAFETY_MARGIN):
+    """A seeded, stratified sample of `examples` fitting in `budget` seconds
+
+    Examples are grouped by the category of their action (see
+    generate_action_templates) and each group is shuffled by `seed`. The
+    groups then take turns adding their next example that still fits, so
+    every category is represented before any is covered in depth.
+
+    Each of the `workers` gets the budget less the fixed `overhead` of a run
+    and a safety `margin`, and every example is packed onto the worker with
+    the most time left. The same examples, costs and seed always give the
+    same sample, which is returned in the original order along with the
+    estimated cost of each example chosen, the worker it was packed onto,
+    and the time left per worker.
+    """
+    rng = random.Random(seed)
+    estimates = estimate_costs(examples, categories, costs)
+
+    strata = {}
+    for idx, (action_id, _) in enumerate(examples):
+        strata.setdefault(categories.get(action_id, 'other'), []).append(idx)
+    for category in sorted(strata):
+        rng.shuffle(strata[category])
+
+    remaining = [worker_capacity(budget, overhead, margin)] * workers
+    selected = []
+    assigned = {}
+    active = sorted(strata)
+    while active:
+        for category in list(active):
+            stratum = strata[category]
+            # the time left on any worker only shrinks, so anything too
+            # expensive now can be dropped for good
+            most = max(remaining)
+            while stratum and estimates[stratum[-1]] > most:
+                stratum.pop()
+            if not stratum:
+                active.remove(category)
+                continue
+            idx = stratum.pop()
+            worker = remaining.index(most)
+            remaining[worker] -= estimates[idx]
+            selected.append(idx)
+            assigned[idx] = worker
+
+    selected.sort()
+    return ([examples[idx] for idx in selected],
+            [estimates[idx] for idx in selected],
+            [assigned[idx] for idx in selected],
+            remaining)
+
+
+class BudgetSampler:
+    """A `select` for run_examples that samples within a time budget
+
+    `categories` maps action ids to their category; run_examples can fill
+    it in before the sampler is called. After being called, `plan` holds the
+    examples packed onto each worker, in order, which run_examples runs as
+    they are when given `shards` (see below), and `summary` describes the
+    sample: how many examples of each category were available and selected,
+    and the estimated cost, load per worker and wall time.
+    """
+    def __init__(self, budget, categories=None, costs=None, overhead=0.0,
+                 seed=0, workers=1, margin=SAFETY_MARGIN):
+        if budget <= 0:
+            raise ValueError("budget should be a positive number of seconds, "
+                             "not %r" % (budget,))
+        worker_capacity(budget, overhead, margin)
+        self.budget = budget
+        self.categories = {} if categories is None else categories
+        self.costs = {} if costs is None else costs
+        self.overhead = overhead
+        self.seed = seed
+        self.workers = workers
+        self.margin = margin
+        self.plan = None
+        self.summary = None
+
+    def __call__(self, examples):
+        selected, estimates, assigned, remaining = sample_examples(
+            examples, self.categories, self.costs, self.budget, self.seed,
+            self.workers, self.overhead, self.margin)
+
+        self.plan = [[] for _ in range(self.workers)]
+        loads = [0.0] * self.workers
+        for example, estimate, worker in zip(selected, estimates, assigned):
+            self.plan[worker].append(example)
+            loads[worker] += estimate
+
+        counts = {}
+        for action_id, _ in examples:
+            category = self.categories.get(action_id, 'other')
+            counts.setdefault(category, {'available': 0, 'selected': 0})
+            counts[category]['available'] += 1
+        for action_id, _ in selected:
+            counts[self.categories.get(action_id, 'other')]['selected'] += 1
+
+        capacity = worker_capacity(self.budget, self.overhead, self.margin)
+        self.summary = {
+            'budget': self.budget,
+            'seed': self.seed,
+            'workers': self.workers,
+            'overhead': self.overhead,
+            'margin': self.margin,
+            'available': len(examples),
+            'selected': len(selected),
+            'estimated_cost': sum(estimates),
+            'estimated_loads': loads,
+            'estimated_wall_time': (self.overhead + capacity
+                                    - min(remaining)),
+            'categories': dict(sorted(counts.items())),
+        }
+        return selected
+
+    def shards(self, examples, workers):
+        """The planned examples of each worker, as run_examples' `shards`"""
+        if self.plan is None:
+            raise ValueError("the sampler has not been called yet")
+        if (workers != self.workers
+                or sorted(examples) != sorted(sum(self.plan, []))):
+            raise ValueError("the examples were not sampled for %d workers "
+                             "by this sampler" % workers)
+        return self.plan
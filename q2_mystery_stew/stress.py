@@ -0,0 +1,217 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+"""Concurrent invocation stress test of a single generated action
+
+Run with ``python -m q2_mystery_stew.stress ACTION_ID``. The usage example of
+the action is run from every combination of ``--threads`` threads in each of
+``--processes`` processes at once, each thread making ``--calls`` calls.
+Every level reports throughput, the latency of the action call itself
+(not the preparation of its inputs or the checks of its outputs) and the
+error rate, so contention in the framework shows up as concurrency
+increases.
+"""
+
+import sys
+import time
+import argparse
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from qiime2.sdk import usage
+
+from q2_mystery_stew.cli import (add_filter_arguments, get_filters,
+                                 add_output_argument, write_report)
+from q2_mystery_stew.plugin_setup import create_plugin, activate_plugin
+from q2_mystery_stew.pool import ArtifactPool, activate_pool
+from q2_mystery_stew.profiling import summarize, collect_example_timings
+
+THREAD_LEVELS = (1, 2, 4, 8)
+PROCESS_LEVELS = (1,)
+
+# The plugin built by each worker process (or by the parent)
+_plugin = None
+
+
+def percentile(values, q):
+    """Nearest-rank percentile `q` (0-100) of a non-empty list of values"""
+    values = sorted(values)
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
+
+
+def latency_summary(latencies):
+    stats = summarize(latencies)
+    stats['p95'] = percentile(latencies, 95)
+    stats['p99'] = percentile(latencies, 99)
+    return stats
+
+
+def _activate(plugin):
+    global _plugin
+    _plugin = activate_plugin(plugin, ArtifactPool())
+
+
+def _init_worker(plugin_options, action_id, example):
+    _activate(create_plugin(lazy=True, **plugin_options))
+    _warm_up(action_id, example)
+
+
+def _get_example(action_id, example):
+    if action_id not in _plugin.actions:
+        raise ValueError('%r is not an action of the plugin built from '
+                         'these options.' % action_id)
+    examples = _plugin.actions[action_id].examples
+    if example is None:
+        example = next(iter(examples))
+    return examples[example]
+
+
+def _warm_up(action_id, example):
+    # builds the action and pools its inputs before anything is timed
+    _get_example(action_id, example)(usage.ExecutionUsage())
+
+
+class _ThreadTimings(threading.local):
+    """The phase timings of the last example run by the current thread"""
+    phases = None
+
+    def __call__(self, action_id, phases):
+        self.phases = phases
+
+
+def _run_threads(action_id, example, threads, calls):
+    """Run the example `calls` times from each of `threads` threads
+
+    All threads wait on a barrier so that they start together. Returns the
+    latency of the action call (the 'action' phase of the example) of every
+    successful call and the traceback of every failure.
+    """
+    example_f = _get_example(action_id, example)
+    barrier = threading.Barrier(threads)
+    timings = _ThreadTimings()
+    latencies = []
+    errors = []
+
+    # list.append is atomic, so the threads share the lists without a lock
+    def worker():
+        barrier.wait()
+        for _ in range(calls):
+            try:
+                example_f(usage.ExecutionUsage())
+            except Exception:
+                errors.append(traceback.format_exc())
+            else:
+                latencies.append(timings.phases['action'])
+
+    with collect_example_timings(timings):
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    return latencies, errors
+
+
+def _level_report(processes, threads, calls, wall_time, latencies, errors):
+    total = processes * threads * calls
+    return {
+        'processes': processes,
+        'threads': threads,
+        'concurrency': processes * threads,
+        'calls': total,
+        'errors': len(errors),
+        'error_rate': len(errors) / total,
+        'wall_time': wall_time,
+        'throughput': len(latencies) / wall_time,
+        'latency': latency_summary(latencies) if latencies else None,
+        'first_error': errors[0] if errors else None,
+    }
+
+
+def stress_action(action_id, example=None, threads=THREAD_LEVELS,
+                  processes=PROCESS_LEVELS, calls=10, **plugin_options):
+    """Run one example of `action_id` at increasing levels of concurrency
+
+    Every (processes, threads) combination is one level, in order of
+    increasing concurrency. `example` defaults to the first example of the
+    action and `plugin_options` are passed to create_plugin. Each worker
+    process runs the example once as it starts, before the level is timed.
+    """
+    levels = sorted({(p, t) for p in processes for t in threads},
+                    key=lambda level: (level[0] * level[1], level))
+
+    _activate(create_plugin(lazy=True, **plugin_options))
+    try:
+        _warm_up(action_id, example)
+        results = []
+        for num_processes, num_threads in levels:
+            if num_processes == 1:
+                start = time.perf_counter()
+                latencies, errors = _run_threads(action_id, example,
+                                                 num_threads, calls)
+                wall_time = time.perf_counter() - start
+            else:
+                with ProcessPoolExecutor(
+                        max_workers=num_processes, initializer=_init_worker,
+                        initargs=(plugin_options, action_id,
+                                  example)) as executor:
+                    start = time.perf_counter()
+                    futures = [executor.submit(_run_threads, action_id,
+                                               example, num_threads, calls)
+                               for _ in range(num_processes)]
+                    latencies, errors = [], []
+                    for future in futures:
+                        worker_latencies, worker_errors = future.result()
+                        latencies.extend(worker_latencies)
+                        errors.extend(worker_errors)
+                    wall_time = time.perf_counter() - start
+
+            results.append(_level_report(num_processes, num_threads, calls,
+                                         wall_time, latencies, errors))
+    finally:
+        activate_pool(None)
+
+    return {
+        'action': action_id,
+        'example': example,
+        'calls_per_thread': calls,
+        'levels': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m q2_mystery_stew.stress',
+        description='Invoke one action from many threads and processes at '
+                    'once and report throughput, tail latency and errors.')
+    parser.add_argument('action_id', help='e.g. int_params_1')
+    parser.add_argument('--example', help='example to run (default: the '
+                                          'first example of the action)')
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=list(THREAD_LEVELS),
+                        help='thread counts per process to run')
+    parser.add_argument('--processes', type=int, nargs='+',
+                        default=list(PROCESS_LEVELS),
+                        help='process counts to run')
+    parser.add_argument('--calls', type=int, default=10,
+                        help='calls made by each thread')
+    add_output_argument(parser)
+    add_filter_arguments(parser)
+    args = parser.parse_args(argv)
+
+    report = stress_action(args.action_id, args.example, args.threads,
+                           args.processes, args.calls, **get_filters(args))
+    write_report(report, args.output)
+
+    return 1 if any(level['errors'] for level in report['levels']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,44 +6,49 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
+import os
 import json
-from inspect import Signature
+import time
+import hashlib
+import itertools
+from inspect import Parameter, Signature
 
+import pandas as pd
 import qiime2
 
 from q2_mystery_stew.format import SingleIntFormat, EchoOutputFmt
 
 OUTPUT_COLLECTION_SIZE = 2
 OUTPUT_COLLECTION_START = 42
-OUTPUT_COLLECTION_END = OUTPUT_COLLECTION_START + OUTPUT_COLLECTION_SIZE
-
-
-def get_disguised_echo_function(id, python_parameters, qiime_outputs):
-    TEMPLATES = [
-        _function_template_1output,
-        _function_template_2output,
-        _function_template_3output,
-        _function_template_4output,
-        _function_template_5output,
-    ]
-
-    # If the first output is a Collection we check how many outputs we have
-    if str(qiime_outputs[0][1]) == 'Collection[EchoOutput]':
-        # If we only have the collection we use this template
-        if len(qiime_outputs) == 1:
-            function = _function_template_collection_only
-        # Otherwise, the collection is first of several, so we use this one
-        else:
-            function = _function_template_collection_first
-    # Now we need to check if the second argument is a collection, only the
-    # first or second ever will be
-    elif len(qiime_outputs) > 1 \
-            and str(qiime_outputs[1][1]) == 'Collection[EchoOutput]':
-        function = _function_template_collection_second
-    # In all other cases, we do not need a collection output template
-    else:
-        function = TEMPLATES[len(qiime_outputs) - 1]
-
+ECHO_COLLECTION_LIMIT = 100
+# 'full' echoes metadata as JSON, 'digest' as a content digest and shape
+ECHO_MODES = ('full', 'digest')
+# 'lines' writes one JSON line per argument, 'indexed' a single JSON object
+# mapping each argument name to its value and type
+ECHO_FORMATS = ('lines', 'indexed')
+# Visualizer assets are written in blocks of about this many bytes
+ASSET_BLOCK_SIZE = 1024 * 1024
+
+
+def output_collection_keys(size=OUTPUT_COLLECTION_SIZE):
+    return range(OUTPUT_COLLECTION_START, OUTPUT_COLLECTION_START + size)
+
+
+def get_disguised_echo_function(id, python_parameters, qiime_outputs,
+                                collection_size=OUTPUT_COLLECTION_SIZE,
+                                echo_mode='full', echo_format='lines',
+                                simulate_work=False):
+    # Outputs which are a Collection are echoed as a collection, in whichever
+    # position they appear
+    collection_idxs = frozenset(
+        idx for idx, (_, qiime_type) in enumerate(qiime_outputs)
+        if str(qiime_type) == 'Collection[EchoOutput]')
+
+    # Every action gets its own function object, so that disguising it never
+    # affects another action (or a concurrent registration)
+    function = _make_echo_function(len(qiime_outputs), collection_idxs,
+                                   collection_size, echo_mode, echo_format,
+                                   simulate_work)
     disguise_echo_function(function, id, python_parameters, len(qiime_outputs))
 
     return function
@@ -61,14 +66,158 @@ def disguise_echo_function(function, name, parameters, num_outputs):
     function.__signature__ = Signature(parameters, return_annotation=outputs)
     function.__annotations__ = annotations
     function.__name__ = name
+    function.__qualname__ = name
+
+
+def get_pipeline_function(id, depth, width, simulate_work=False):
+    """A pipeline running `depth` rounds of fan out, link and fan in
+
+    Each round splits the chain into `width` branches with
+    echo_fan_out_{width}, passes each through echo_link, and joins them with
+    echo_fan_in_{width}. The chain starts from echo_seed. With
+    `simulate_work` the branches run echo_work for `duration` seconds
+    instead, and their outputs are returned after the final one.
+    """
+    def pipeline(ctx, seed, **kwargs):
+        seed_action = ctx.get_action('mystery_stew', 'echo_seed')
+        fan_out = ctx.get_action('mystery_stew', f'echo_fan_out_{width}')
+        fan_in = ctx.get_action('mystery_stew', f'echo_fan_in_{width}')
+        if simulate_work:
+            work = ctx.get_action('mystery_stew', 'echo_work')
+        else:
+            link = ctx.get_action('mystery_stew', 'echo_link')
+
+        tasks = []
+        current, = seed_action(seed=seed)
+        for _ in range(depth):
+            branches = fan_out(input=current)
+            if simulate_work:
+                linked = [work(input=branch, duration=kwargs['duration'])[0]
+                          for branch in branches]
+                tasks.extend(linked)
+            else:
+                linked = [link(input=branch)[0] for branch in branches]
+            if width == 1:
+                current, = fan_in(input=linked[0])
+            else:
+                current, = fan_in(**{f'input{idx}': result for idx, result
+                                     in enumerate(linked, 1)})
+
+        return (current, *tasks)
+
+    parameters = [
+        Parameter('ctx', Parameter.POSITIONAL_OR_KEYWORD),
+        Parameter('seed', Parameter.POSITIONAL_OR_KEYWORD, annotation=int)]
+    if simulate_work:
+        parameters.append(Parameter('duration',
+                                    Parameter.POSITIONAL_OR_KEYWORD,
+                                    annotation=float))
+    pipeline.__signature__ = Signature(parameters)
+    pipeline.__name__ = id
+    pipeline.__qualname__ = id
+
+    return pipeline
+
+
+def get_visualizer_function(id, num_assets, asset_size, echo_mode='full'):
+    """A visualizer writing an index.html and `num_assets` text assets
+
+    The index echoes the arguments and links every asset. Each asset is
+    `asset_size` bytes of a line which is the asset's digest (see
+    asset_line), repeated.
+    """
+    def visualizer(output_dir, **kwargs):
+        assets_dir = os.path.join(output_dir, 'assets')
+        if num_assets:
+            os.makedirs(assets_dir)
+
+        with open(os.path.join(output_dir, 'index.html'), 'w') as fh:
+            fh.write('<html>\n<body>\n<pre>\n')
+            for name, arg in kwargs.items():
+                fh.write(argument_to_line(name, arg, echo_mode))
+            fh.write('</pre>\n<ul>\n')
+            for idx in range(num_assets):
+                fh.write('<li><a href="assets/%s">%s</a></li>\n'
+                         % (asset_name(idx), asset_name(idx)))
+            fh.write('</ul>\n</body>\n</html>\n')
+
+        for idx in range(num_assets):
+            _write_asset(os.path.join(assets_dir, asset_name(idx)),
+                         asset_line(kwargs['seed'], idx), asset_size)
+
+    parameters = [
+        Parameter('output_dir', Parameter.POSITIONAL_OR_KEYWORD,
+                  annotation=str),
+        Parameter('seed', Parameter.POSITIONAL_OR_KEYWORD, annotation=int)]
+    visualizer.__signature__ = Signature(parameters, return_annotation=None)
+    visualizer.__annotations__ = {'output_dir': str, 'seed': int,
+                                  'return': None}
+    visualizer.__name__ = id
+    visualizer.__qualname__ = id
+
+    return visualizer
+
+
+def asset_name(idx):
+    return f'asset_{idx}.txt'
+
+
+def asset_line(seed, idx):
+    return hashlib.sha256(f'{seed}-{idx}'.encode('utf-8')).hexdigest() + '\n'
+
+
+def _write_asset(path, line, size):
+    block = line * (ASSET_BLOCK_SIZE // len(line) + 1)
+    with open(path, 'w') as fh:
+        while size > 0:
+            chunk = block[:size]
+            fh.write(chunk)
+            size -= len(chunk)
+
+
+def _make_echo_function(num_outputs, collection_idxs=frozenset(),
+                        collection_size=OUTPUT_COLLECTION_SIZE,
+                        echo_mode='full', echo_format='lines',
+                        simulate_work=False):
+    def echo_function(**kwargs):
+        if simulate_work:
+            # Wall clock times, so they compare across worker processes
+            started = time.time()
+            time.sleep(kwargs['duration'])
+            kwargs = dict(kwargs, started=started, finished=time.time())
+        return _echo_outputs(kwargs, num_outputs, collection_idxs,
+                             collection_size, echo_mode, echo_format)
+
+    return echo_function
+
+
+def argument_to_line(name, arg, echo_mode='full'):
+    return json.dumps(argument_to_entry(name, arg, echo_mode)) + '\n'
+
+
+def arguments_to_index(arguments, echo_mode='full'):
+    index = {}
+    for name, arg in arguments.items():
+        _, value, expected_type = argument_to_entry(name, arg, echo_mode)
+        index[name] = [value, expected_type]
+
+    return json.dumps(index, sort_keys=True) + '\n'
 
 
-def argument_to_line(name, arg):
+def argument_to_entry(name, arg, echo_mode='full'):
     value = arg
     expected_type = type(arg).__name__
 
     if isinstance(arg, SingleIntFormat):
         value = arg.get_int()
+    elif isinstance(arg, EchoOutputFmt):
+        # Relayed outputs are echoed by content, so the end of a pipeline
+        # depends on every step before it
+        value = echo_digest(arg)
+    elif echo_mode == 'digest' and isinstance(
+            arg, (qiime2.Metadata, qiime2.CategoricalMetadataColumn,
+                  qiime2.NumericMetadataColumn)):
+        value = metadata_digest(arg)
     elif isinstance(arg, qiime2.Metadata):
         value = arg.to_dataframe().to_json()
     elif isinstance(arg, (qiime2.CategoricalMetadataColumn,
@@ -77,58 +226,96 @@ def argument_to_line(name, arg):
 
     if type(arg) is list:
         temp = []
-        for i in value:
+        for i in value[:ECHO_COLLECTION_LIMIT]:
             if isinstance(i, SingleIntFormat):
                 temp.append(i.get_int())
                 expected_type = 'list'
             else:
                 temp.append(i)
         else:
-            value = temp
+            value = _bound_collection(temp, len(arg))
     elif type(arg) is qiime2.ResultCollection or type(arg) is dict:
         temp = {}
-        for k, v in value.items():
+        for k, v in itertools.islice(value.items(), ECHO_COLLECTION_LIMIT):
             if isinstance(v, SingleIntFormat):
                 temp[k] = v.get_int()
                 expected_type = 'dict'
             else:
                 temp[k] = v
 
-        value = temp
+        value = _bound_collection(temp, len(arg))
 
-    return json.dumps([name, value, expected_type]) + '\n'
+    return [name, value, expected_type]
 
 
-def _echo_outputs(kwargs, num_outputs, collection_idx=None):
-    outputs = []
+def echo_digest(fmt):
+    with fmt.open() as fh:
+        return hashlib.sha256(fh.read().encode('utf-8')).hexdigest()
+
 
-    if collection_idx == 0:
-        output = _echo_collection(kwargs=kwargs, idx=0)
+def metadata_digest(md):
+    """A stable content digest and the shape of metadata or a column"""
+    if isinstance(md, qiime2.Metadata):
+        data = md.to_dataframe()
+        labels = [str(c) for c in data.columns]
+        dtypes = [str(t) for t in data.dtypes]
     else:
-        output = _echo_single(kwargs=kwargs, idx=0)
+        data = md.to_series()
+        labels = [str(data.name)]
+        dtypes = [str(data.dtype)]
+
+    digest = hashlib.sha256()
+    header = [str(data.index.name), labels, dtypes]
+    digest.update(json.dumps(header).encode('utf-8'))
+    # Hashes each row, including its index, without serializing the values
+    row_hashes = pd.util.hash_pandas_object(data, index=True)
+    digest.update(row_hashes.values.tobytes())
+
+    return {'digest': digest.hexdigest(), 'shape': list(data.shape)}
+
+
+def _bound_collection(head, size):
+    # Large collections only echo their size and first members, so echoing
+    # (and asserting on) them does not grow with the collection
+    if size > ECHO_COLLECTION_LIMIT:
+        return {'size': size, 'head': head}
+    return head
 
-    outputs.append(output)
 
-    # We already handled the 1st output above
-    for idx in range(1, num_outputs):
-        if idx == collection_idx:
-            output = _echo_collection(idx=idx)
+def _echo_outputs(kwargs, num_outputs, collection_idxs=frozenset(),
+                  collection_size=OUTPUT_COLLECTION_SIZE, echo_mode='full',
+                  echo_format='lines'):
+    outputs = []
+
+    for idx in range(num_outputs):
+        # Only the first output echoes the arguments, the rest echo their index
+        output_kwargs = kwargs if idx == 0 else None
+        if idx in collection_idxs:
+            output = _echo_collection(kwargs=output_kwargs, idx=idx,
+                                      size=collection_size,
+                                      echo_mode=echo_mode,
+                                      echo_format=echo_format)
         else:
-            output = _echo_single(idx=idx)
+            output = _echo_single(kwargs=output_kwargs, idx=idx,
+                                  echo_mode=echo_mode,
+                                  echo_format=echo_format)
 
         outputs.append(output)
 
     return tuple(outputs)
 
 
-def _echo_collection(kwargs=None, idx=None):
+def _echo_collection(kwargs=None, idx=None, size=OUTPUT_COLLECTION_SIZE,
+                     echo_mode='full', echo_format='lines'):
     outputs = {}
 
     if kwargs:
         for name, arg in kwargs.items():
-            outputs[name] = _echo_single(kwargs={name: arg})
+            outputs[name] = _echo_single(kwargs={name: arg},
+                                         echo_mode=echo_mode,
+                                         echo_format=echo_format)
     else:
-        for i in range(OUTPUT_COLLECTION_START, OUTPUT_COLLECTION_END):
+        for i in output_collection_keys(size):
             # Elements within a collection have a dual index, the index of the
             # entire output followed by the index of the element within the
             # collection
@@ -137,46 +324,17 @@ def _echo_collection(kwargs=None, idx=None):
     return outputs
 
 
-def _echo_single(kwargs=None, idx=None):
+def _echo_single(kwargs=None, idx=None, echo_mode='full',
+                 echo_format='lines'):
     output = EchoOutputFmt()
 
     with output.open() as fh:
-        if kwargs:
+        if kwargs and echo_format == 'indexed':
+            fh.write(arguments_to_index(kwargs, echo_mode))
+        elif kwargs:
             for name, arg in kwargs.items():
-                fh.write(argument_to_line(name, arg))
+                fh.write(argument_to_line(name, arg, echo_mode))
         else:
             fh.write(str(idx))
 
     return output
-
-
-def _function_template_1output(**kwargs):
-    return _echo_outputs(kwargs, 1)
-
-
-def _function_template_2output(**kwargs):
-    return _echo_outputs(kwargs, 2)
-
-
-def _function_template_3output(**kwargs):
-    return _echo_outputs(kwargs, 3)
-
-
-def _function_template_4output(**kwargs):
-    return _echo_outputs(kwargs, 4)
-
-
-def _function_template_5output(**kwargs):
-    return _echo_outputs(kwargs, 5)
-
-
-def _function_template_collection_only(**kwargs):
-    return _echo_outputs(kwargs, 1, 0)
-
-
-def _function_template_collection_first(**kwargs):
-    return _echo_outputs(kwargs, 2, 0)
-
-
-def _function_template_collection_second(**kwargs):
-    return _echo_outputs(kwargs, 2, 1)
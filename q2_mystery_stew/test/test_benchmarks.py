@@ -0,0 +1,42 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import unittest
+
+from q2_mystery_stew.benchmarks import compare_results
+from q2_mystery_stew.profiling import action_family, summarize
+
+
+class TestBenchmarkHelpers(unittest.TestCase):
+    def test_action_family(self):
+        self.assertEqual(action_family('int_params_12'), 'int_params')
+        self.assertEqual(action_family('multiple_outputs_3'),
+                         'multiple_outputs')
+        self.assertEqual(action_family('typemap_lists_defaults2'),
+                         'typemap_lists')
+        self.assertEqual(action_family('collection_first'),
+                         'collection_first')
+
+    def test_summarize(self):
+        obs = summarize([1.0, 2.0, 3.0])
+        self.assertEqual(obs['repeat'], 3)
+        self.assertEqual(obs['median'], 2.0)
+        self.assertEqual(obs['min'], 1.0)
+        self.assertEqual(obs['stdev'], 1.0)
+
+    def test_compare_results(self):
+        baseline = {'a': {'median': 1.0}, 'b': {'median': 1.0}}
+        results = {'a': {'median': 1.05}, 'b': {'median': 1.5},
+                   'c': {'median': 9.0}}
+
+        self.assertEqual(compare_results(results, baseline, threshold=0.1),
+                         {'b': 1.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
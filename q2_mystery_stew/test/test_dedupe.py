@@ -0,0 +1,87 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import unittest
+
+from q2_mystery_stew.dedupe import InvocationIndex, invocation_key
+from q2_mystery_stew.format import SingleIntFormat
+from q2_mystery_stew.generators.artifacts import single_int1_1, single_int1_2
+from q2_mystery_stew.generators.base import ParamSpec
+from q2_mystery_stew.plugin_setup import create_plugin
+
+
+def specs(**view_types):
+    return {name: ParamSpec(name, None, view_type)
+            for name, view_type in view_types.items()}
+
+
+class TestInvocationIndex(unittest.TestCase):
+    def test_invocation_key(self):
+        self.assertEqual(
+            invocation_key({'a': single_int1_1, 'x': 1},
+                           specs(a=SingleIntFormat, x=int)),
+            invocation_key({'y': 1, 'b': single_int1_1},
+                           specs(b=SingleIntFormat, y=int)))
+        self.assertNotEqual(
+            invocation_key({'a': single_int1_1}, specs(a=SingleIntFormat)),
+            invocation_key({'a': single_int1_2}, specs(a=SingleIntFormat)))
+        self.assertNotEqual(invocation_key({'a': 1}, specs(a=int)),
+                            invocation_key({'a': 1}, specs(a=float)))
+        self.assertNotEqual(invocation_key({'a': 1}, specs(a=int)),
+                            invocation_key({'a': True}, specs(a=int)))
+
+    def test_report(self):
+        index = InvocationIndex()
+        index.add('first', 'example_0', {'input': single_int1_1, 'x': 1},
+                  specs(input=SingleIntFormat, x=int))
+        index.add('second', 'example_0', {'x': 1, 'other': single_int1_1},
+                  specs(other=SingleIntFormat, x=int))
+        index.add('second', 'example_1',
+                  {'inputs': [single_int1_1, single_int1_2]},
+                  specs(inputs=SingleIntFormat))
+        index.add('third', 'example_0', {}, {})
+
+        self.assertEqual(
+            index.equivalent({'y': 1, 'input': single_int1_1},
+                             specs(input=SingleIntFormat, y=int)),
+            [('first', 'example_0'), ('second', 'example_0')])
+        report = index.report()
+        self.assertEqual(report['examples'], 4)
+        self.assertEqual(report['examples_with_inputs'], 3)
+        self.assertEqual(report['equivalent_examples'], 1)
+        self.assertEqual(report['preparations'], 4)
+        self.assertEqual(report['unique_preparations'], 2)
+        self.assertEqual(report['preparations_saved'], 2)
+        self.assertEqual(report['saved_fraction'], 0.5)
+        self.assertEqual(report['largest_groups'],
+                         [[['first', 'example_0'], ['second', 'example_0']]])
+        self.assertEqual(report['shared_inputs'],
+                         {'single_int1_1 as SingleIntFormat': 3})
+
+    def test_from_plugin(self):
+        plugin = create_plugin(artifacts=True)
+        index = InvocationIndex.from_plugin(plugin)
+
+        # simple_type1 and union_type are both passed single_int1_1 first
+        self.assertIn(
+            ('artifact_params_3', 'example_0'),
+            index.equivalent({'input': single_int1_1},
+                             specs(input=SingleIntFormat)))
+        self.assertIn(
+            ('artifact_params_1', 'example_0'),
+            index.equivalent({'input': single_int1_1},
+                             specs(input=SingleIntFormat)))
+
+        report = index.report()
+        self.assertGreater(report['preparations_saved'], 0)
+        self.assertEqual(
+            report['shared_inputs']['single_int1_1 as SingleIntFormat'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
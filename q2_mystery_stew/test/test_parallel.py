@@ -0,0 +1,75 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import unittest
+
+from qiime2.sdk import PluginManager, usage
+
+from q2_mystery_stew.plugin_setup import create_plugin
+from q2_mystery_stew.parallel import (task_metrics, read_task_times,
+                                      scale_parallel_pipeline)
+
+
+class TestParallelPipelines(unittest.TestCase):
+    def test_examples(self):
+        for echo_format in ('lines', 'indexed'):
+            plugin = create_plugin(parallel_pipelines=True,
+                                   echo_format=echo_format)
+            pm = PluginManager(add_plugins=False)
+            pm.add_plugin(plugin)
+            self.assertEqual(list(plugin.pipelines),
+                             ['parallel_2', 'parallel_4', 'parallel_8',
+                              'parallel_16', 'parallel_32'])
+            for pipeline in plugin.pipelines.values():
+                for example in pipeline.examples.values():
+                    example(usage.ExecutionUsage())
+
+    def test_shares_relay_methods(self):
+        plugin = create_plugin(pipelines=True, parallel_pipelines=True,
+                               pipeline_shapes=[(1, 2)])
+        self.assertIn('pipeline_1x2', plugin.pipelines)
+        self.assertIn('parallel_2', plugin.pipelines)
+        self.assertEqual(list(plugin.methods).count('echo_fan_out_2'), 1)
+
+    def test_task_times(self):
+        plugin = create_plugin(parallel_pipelines=True)
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        results = plugin.pipelines['parallel_2'](seed=1, duration=0.05)
+        for result in results[1:]:
+            started, finished = read_task_times(result)
+            self.assertGreaterEqual(finished - started, 0.05)
+
+    def test_task_metrics(self):
+        obs = task_metrics(10.0, 3.0, [(11.0, 12.0), (11.0, 12.0),
+                                       (11.5, 12.5)])
+        self.assertEqual(obs['tasks'], 3)
+        self.assertEqual(obs['span'], 1.5)
+        self.assertEqual(obs['scheduling_overhead'], 1.5)
+        self.assertEqual(obs['achieved_parallelism'], 2.0)
+        self.assertEqual(obs['task_latency']['median'], 1.0)
+        self.assertEqual(obs['start_delay']['max'], 1.5)
+
+    def test_scale_with_threads(self):
+        report = scale_parallel_pipeline(4, workers=(1, 4), duration=0.2)
+
+        self.assertEqual(report['action'], 'parallel_4')
+        serial, parallel = report['runs']
+        self.assertEqual(serial['tasks'], 4)
+        self.assertLess(serial['achieved_parallelism'], 1.5)
+        self.assertGreater(parallel['achieved_parallelism'], 1.5)
+        self.assertGreater(parallel['speedup'], 1.0)
+
+    def test_bad_width(self):
+        with self.assertRaisesRegex(ValueError, 'width'):
+            scale_parallel_pipeline(3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,444 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import pickle
+import tempfile
+import itertools
+import unittest
+from unittest import mock
+
+import qiime2
+import qiime2.sdk
+from qiime2.sdk import PluginManager, usage
+
+from q2_mystery_stew.plugin_setup import create_plugin, LazyMethod
+from q2_mystery_stew.manifest import manifest_key
+from q2_mystery_stew.generators import (generate_action_templates,
+                                        generate_synthetic_methods,
+                                        cover_invocations, Invocation)
+from q2_mystery_stew.generators.base import argument_key
+from q2_mystery_stew.profiling import PhaseReport, collect_example_timings
+from q2_mystery_stew.format import EchoOutputFmt
+
+
+class TestLazyPlugin(unittest.TestCase):
+    def test_lazy_actions_match_eager(self):
+        eager = create_plugin(ints=True)
+        lazy = create_plugin(lazy=True, ints=True)
+
+        self.assertEqual(list(eager.actions), list(lazy.actions))
+        self.assertTrue(issubclass(LazyMethod, qiime2.sdk.Method))
+        for action in lazy.methods.values():
+            self.assertIs(type(action), LazyMethod)
+            # nothing is built until the method is used
+            self.assertNotIn('signature', vars(action))
+
+    def test_materialized_on_access(self):
+        plugin = create_plugin(lazy=True, ints=True)
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        action = plugin.actions['int_params_1']
+        self.assertEqual(list(action.signature.parameters),
+                         ['single_int', 'optional_single_int',
+                          'default0_single_int', 'default1_single_int',
+                          'default2_single_int'])
+        self.assertNotIsInstance(
+            dict.__getitem__(plugin.methods, 'int_params_1'), LazyMethod)
+        self.assertIsInstance(
+            dict.__getitem__(plugin.methods, 'int_params_2'), LazyMethod)
+
+        action.examples['example_0'](usage.ExecutionUsage())
+
+    def test_lazy_method_pickles(self):
+        plugin = create_plugin(lazy=True, ints=True)
+        action = dict.__getitem__(plugin.methods, 'int_params_1')
+
+        restored = pickle.loads(pickle.dumps(action))
+        self.assertEqual(restored.id, 'int_params_1')
+        self.assertEqual(list(restored.signature.parameters),
+                         list(action.signature.parameters))
+
+
+class TestManifestCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix='mystery-stew-test-')
+        self.dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_warm_build_skips_generators(self):
+        cold = create_plugin(manifest_dir=self.dir, ints=True, strings=True)
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+
+        with mock.patch('q2_mystery_stew.manifest.generate_action_templates',
+                        side_effect=AssertionError('generators were run')):
+            warm = create_plugin(manifest_dir=self.dir, ints=True,
+                                 strings=True)
+
+        self.assertEqual(list(cold.actions), list(warm.actions))
+        self.assertEqual(warm.actions['int_params_1'].signature,
+                         cold.actions['int_params_1'].signature)
+
+    def test_key_changes_with_filters(self):
+        self.assertNotEqual(manifest_key({'ints': True}),
+                            manifest_key({'ints': True, 'bools': True}))
+        self.assertEqual(manifest_key({'ints': True, 'bools': True}),
+                         manifest_key({'bools': True, 'ints': True}))
+
+        create_plugin(manifest_dir=self.dir, ints=True)
+        create_plugin(manifest_dir=self.dir, bools=True)
+        self.assertEqual(len(os.listdir(self.dir)), 2)
+
+
+class TestParallelGeneration(unittest.TestCase):
+    def test_matches_serial_build(self):
+        serial = generate_action_templates()
+        parallel = generate_action_templates(workers=2)
+
+        self.assertEqual([t.action_id for t in serial],
+                         [t.action_id for t in parallel])
+        for s, p in zip(serial, parallel):
+            self.assertEqual(list(s.parameter_specs),
+                             list(p.parameter_specs))
+            self.assertEqual(len(s.invocation_domain),
+                             len(p.invocation_domain))
+
+
+class TestPhaseReport(unittest.TestCase):
+    def test_create_plugin_phases(self):
+        report = PhaseReport()
+        plugin = create_plugin(report=report, ints=True, collections=True,
+                               typemaps=True)
+
+        phases = report.to_dict()
+        self.assertEqual(list(phases), [
+            'register_base_implementation', 'int_params', 'list_int_params',
+            'collection_int_params', 'generate_typemap_methods',
+            'register_test_method'])
+        self.assertEqual(phases['register_test_method']['calls'],
+                         len(plugin.actions))
+
+
+class TestPipelines(unittest.TestCase):
+    def test_pipeline_shapes(self):
+        plugin = create_plugin(pipelines=True,
+                               pipeline_shapes=[(2, 3), (1, 1), (2, 3)])
+
+        self.assertEqual(list(plugin.pipelines), ['pipeline_2x3',
+                                                  'pipeline_1x1'])
+        self.assertEqual(list(plugin.methods),
+                         ['echo_seed', 'echo_link', 'echo_fan_out_1',
+                          'echo_fan_in_1', 'echo_fan_out_3',
+                          'echo_fan_in_3'])
+        self.assertEqual(
+            len(plugin.methods['echo_fan_out_3'].signature.outputs), 3)
+        self.assertEqual(list(plugin.methods['echo_fan_in_3'].signature
+                              .inputs), ['input1', 'input2', 'input3'])
+
+    def test_pipeline_examples(self):
+        for echo_format in ('lines', 'indexed'):
+            plugin = create_plugin(pipelines=True, echo_format=echo_format,
+                                   pipeline_shapes=[(1, 1), (3, 2)])
+            pm = PluginManager(add_plugins=False)
+            pm.add_plugin(plugin)
+            for pipeline in plugin.pipelines.values():
+                for example in pipeline.examples.values():
+                    example(usage.ExecutionUsage())
+
+    def test_pipeline_output_depends_on_seed(self):
+        plugin = create_plugin(pipelines=True, pipeline_shapes=[(2, 2)])
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        def run(seed):
+            final, = plugin.pipelines['pipeline_2x2'](seed=seed)
+            with final.view(EchoOutputFmt).open() as fh:
+                return [json.loads(line) for line in fh]
+
+        first = run(42)
+        self.assertEqual([name for name, _, _ in first],
+                         ['input1', 'input2'])
+        self.assertEqual(run(42), first)
+        self.assertNotEqual(run(7), first)
+
+    def test_opt_out(self):
+        self.assertNotIn('pipeline_1x1', create_plugin(ints=True).actions)
+        self.assertIn('pipeline_1x1', create_plugin().actions)
+
+    def test_bad_shape(self):
+        with self.assertRaisesRegex(ValueError, 'pipeline_shapes'):
+            create_plugin(pipeline_shapes=[(0, 2)])
+
+
+class TestVisualizers(unittest.TestCase):
+    def test_visualizer_sizes(self):
+        plugin = create_plugin(visualizers=True,
+                               visualizer_sizes=[(3, 100), (0, 0), (3, 100)])
+        self.assertEqual(list(plugin.visualizers),
+                         ['visualizer_3x100', 'visualizer_0x0'])
+        self.assertEqual(list(plugin.methods), [])
+
+    def test_output_size(self):
+        plugin = create_plugin(visualizers=True, visualizer_sizes=[(3, 100)])
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        viz, = plugin.visualizers['visualizer_3x100'](seed=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            viz.export_data(tmp)
+            assets = sorted(os.listdir(os.path.join(tmp, 'assets')))
+            sizes = [os.path.getsize(os.path.join(tmp, 'assets', asset))
+                     for asset in assets]
+            with open(os.path.join(tmp, 'index.html')) as fh:
+                index = fh.read()
+
+        self.assertEqual(assets, ['asset_0.txt', 'asset_1.txt',
+                                  'asset_2.txt'])
+        self.assertEqual(sizes, [100, 100, 100])
+        self.assertIn('["seed", 1, "int"]', index)
+        self.assertEqual(index.count('<a href="assets/'), 3)
+
+    def test_examples_record_save(self):
+        plugin = create_plugin(visualizers=True)
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        with collect_example_timings() as timings:
+            for visualizer in plugin.visualizers.values():
+                for example in visualizer.examples.values():
+                    example(usage.ExecutionUsage())
+
+        self.assertEqual([r['action'] for r in timings.records],
+                         ['visualizer_0x0', 'visualizer_10x1000',
+                          'visualizer_100x10000'])
+        for record in timings.records:
+            self.assertEqual(list(record['phases']),
+                             ['materialize', 'action', 'assert', 'save'])
+
+    def test_bad_size(self):
+        with self.assertRaisesRegex(ValueError, 'visualizer_sizes'):
+            create_plugin(visualizer_sizes=[(-1, 10)])
+
+
+class TestCoveringStrategy(unittest.TestCase):
+    def test_cover_invocations(self):
+        a = [('output', 'A')]
+        invocations = [Invocation({'x': x, 'y': y, 'z': z}, a)
+                       for x, y, z in itertools.product((1, 'a'), (2, 'b'),
+                                                        (3, 'c'))]
+
+        def levels(invocation, names):
+            return tuple(invocation.kwargs[name] for name in names)
+
+        self.assertEqual(len(cover_invocations(invocations, strength=1)), 2)
+        self.assertEqual(cover_invocations(invocations, strength=3),
+                         invocations)
+
+        pairwise = cover_invocations(invocations, strength=2)
+        self.assertEqual(len(pairwise), 4)
+        for names in itertools.combinations('xyz', 2):
+            self.assertEqual({levels(i, names) for i in pairwise},
+                             {levels(i, names) for i in invocations})
+
+    def test_cover_keeps_explicit_defaults(self):
+        a = [('output', 'A')]
+        defaults = {'optional': None, 'default0': 1, 'default1': 2}
+        invocations = [
+            Invocation({'param': 1}, a),
+            Invocation({'param': 2}, a),
+            Invocation({'param': 2, **defaults}, a),
+            Invocation({'param': 2, 'optional': 2, 'default0': 2,
+                        'default1': 1}, a),
+        ]
+
+        # passing a default is not the same as leaving it out
+        self.assertEqual(cover_invocations(invocations, strength=1),
+                         [invocations[0], invocations[2], invocations[3]])
+        # only the second leaves the defaults out with param=2
+        self.assertEqual(cover_invocations(invocations, strength=2),
+                         invocations)
+
+    def test_cover_keeps_output_branches(self):
+        invocations = [Invocation({'x': 1}, [('output', 'A')]),
+                       Invocation({'x': 1}, [('output', 'A')]),
+                       Invocation({'x': 1}, [('output', 'B')]),
+                       Invocation({}, [('output', 'A')])]
+
+        for strength in (1, 2):
+            self.assertEqual(cover_invocations(invocations, strength),
+                             invocations[:1] + invocations[2:])
+
+    def test_strength_on_generated_action(self):
+        template, = [t for t in generate_action_templates(interactions=True)
+                     if t.action_id == 'interactions_4']
+        domain = template.invocation_domain
+        self.assertEqual(len(domain), 3 * 2 * 3 * 3)
+
+        sizes = [len(cover_invocations(domain, strength))
+                 for strength in (1, 2, 3, 4)]
+        self.assertEqual(sizes, sorted(set(sizes)))
+        self.assertEqual(sizes[0], 3)
+        self.assertEqual(sizes[-1], len(domain))
+
+        # both members of the auto_int union are still passed
+        covered = cover_invocations(domain, strength=1)
+        self.assertEqual({type(i.kwargs['p4_auto_int']) for i in covered},
+                         {int, str})
+
+    def test_every_argument_is_covered(self):
+        def levels(invocations):
+            return {(argument_key(i.expected_output_types), name,
+                     argument_key(arg))
+                    for i in invocations for name, arg in i.kwargs.items()}
+
+        # every default family, and the interaction methods
+        for template in (generate_action_templates()
+                         + generate_action_templates(interactions=True)):
+            full = template.invocation_domain
+            self.assertEqual(levels(cover_invocations(full, strength=1)),
+                             levels(full), template.action_id)
+
+    def test_covering_templates(self):
+        filters = dict(ints=True, bools=True, collections=True,
+                       typemaps=True, interactions=True)
+        exhaustive = generate_action_templates(**filters)
+        covering = generate_action_templates(invocation_strategy='covering',
+                                             **filters)
+
+        def examples(templates):
+            return sum(len(t.invocation_domain) for t in templates)
+
+        self.assertLess(examples(covering), examples(exhaustive))
+        for full, covered in zip(exhaustive, covering):
+            self.assertEqual(full.action_id, covered.action_id)
+            self.assertGreater(len(covered.invocation_domain), 0)
+            # every output branch, such as each row of a typemap, is kept
+            self.assertEqual(
+                {argument_key(i.expected_output_types)
+                 for i in covered.invocation_domain},
+                {argument_key(i.expected_output_types)
+                 for i in full.invocation_domain})
+
+        self.assertIn('typemap_the_matrix',
+                      [t.action_id for t in covering])
+
+    def test_covering_plugin(self):
+        filters = dict(ints=True, bools=True, collections=True,
+                       typemaps=True, interactions=True)
+        exhaustive = create_plugin(**filters)
+        covering = create_plugin(invocation_strategy='covering', **filters)
+
+        self.assertEqual(list(exhaustive.actions), list(covering.actions))
+        self.assertLess(
+            sum(len(a.examples) for a in covering.actions.values()),
+            sum(len(a.examples) for a in exhaustive.actions.values()))
+        self.assertEqual(
+            len(exhaustive.actions['interactions_3'].examples), 18)
+        self.assertEqual(len(covering.actions['interactions_3'].examples), 9)
+
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(covering)
+        for action_id in ('interactions_3', 'typemap_the_matrix'):
+            for example in covering.actions[action_id].examples.values():
+                example(usage.ExecutionUsage())
+
+    def test_strategy_is_part_of_manifest_key(self):
+        self.assertNotEqual(
+            manifest_key({}, invocation_strategy='exhaustive', strength=2),
+            manifest_key({}, invocation_strategy='covering', strength=2))
+
+    def test_bad_strategy(self):
+        with self.assertRaisesRegex(ValueError, 'invocation_strategy'):
+            create_plugin(invocation_strategy='random')
+        with self.assertRaisesRegex(ValueError, 'strength'):
+            create_plugin(invocation_strategy='covering', strength=0)
+
+
+class TestSyntheticScale(unittest.TestCase):
+    def test_synthetic_actions(self):
+        plugin = create_plugin(scale=20, bools=True)
+        synthetic = [a for a in plugin.actions if a.startswith('synthetic_')]
+        self.assertEqual(synthetic, [f'synthetic_{i}' for i in range(20)])
+
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+        for action_id in synthetic:
+            action = plugin.actions[action_id]
+            for example in action.examples.values():
+                example(usage.ExecutionUsage())
+
+    def test_deterministic(self):
+        whole = list(generate_synthetic_methods(0, 30))
+        tail = list(generate_synthetic_methods(20, 30))
+
+        for exp, obs in zip(whole[20:], tail):
+            self.assertEqual(exp.action_id, obs.action_id)
+            self.assertEqual(list(exp.parameter_specs),
+                             list(obs.parameter_specs))
+            self.assertEqual(exp.invocation_domain[0].kwargs.keys(),
+                             obs.invocation_domain[0].kwargs.keys())
+
+    def test_bad_scale(self):
+        with self.assertRaisesRegex(ValueError, 'scale'):
+            create_plugin(scale=-1)
+
+
+class TestWideOutputs(unittest.TestCase):
+    def test_stress_filter_is_opt_in(self):
+        self.assertNotIn('wide_outputs_50', create_plugin().actions)
+
+    def test_wide_output_example(self):
+        plugin = create_plugin(wide_outputs=True)
+        self.assertEqual(list(plugin.actions),
+                         ['wide_outputs_50', 'wide_outputs_100',
+                          'wide_outputs_250', 'wide_outputs_500'])
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        action = plugin.actions['wide_outputs_50']
+        self.assertEqual(len(action.signature.outputs), 50)
+        action.examples['example_0'](usage.ExecutionUsage())
+
+
+class TestCollectionSize(unittest.TestCase):
+    def test_configured_size(self):
+        plugin = create_plugin(collection_size=7, output_collections=True)
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        action = plugin.actions['collection_only']
+        use = usage.ExecutionUsage()
+        action.examples['example_0'](use)
+        results = action()
+        self.assertEqual(len(results.output), 7)
+
+    def test_large_collections_are_opt_in(self):
+        self.assertNotIn('large_collection_10000', create_plugin().actions)
+        plugin = create_plugin(large_output_collections=True)
+        self.assertEqual(list(plugin.actions), ['large_collection_10000',
+                                                'large_collection_100000'])
+
+
+class TestLargeInputCollections(unittest.TestCase):
+    def test_large_collection_examples(self):
+        plugin = create_plugin(large_collections=True)
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        self.assertEqual(list(plugin.actions),
+                         [f'large_collection_params_{i}' for i in range(1, 5)])
+        for action in plugin.actions.values():
+            action.examples['example_0'](usage.ExecutionUsage())
+
+
+if __name__ == '__main__':
+    unittest.main()
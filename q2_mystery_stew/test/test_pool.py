@@ -0,0 +1,72 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import tempfile
+import unittest
+
+from q2_mystery_stew.format import SingleIntFormat
+from q2_mystery_stew.pool import (ArtifactPool, artifact_pool, factory_key,
+                                  get_active_pool, POOLED_FACTORIES)
+from q2_mystery_stew.generators.artifacts import single_int1_1, single_int1_2
+from q2_mystery_stew.generators.metadata import artifact_cat, metadata1
+
+
+class TestArtifactPool(unittest.TestCase):
+    def test_no_pool(self):
+        self.assertIsNone(get_active_pool())
+        self.assertIsNot(single_int1_1(), single_int1_1())
+
+    def test_shared_within_pool(self):
+        with artifact_pool() as pool:
+            first = single_int1_1()
+            self.assertIs(single_int1_1(), first)
+            self.assertIsNot(single_int1_2(), first)
+            self.assertIs(metadata1(), metadata1())
+
+        self.assertEqual(pool.imports, 3)
+        self.assertEqual(pool.hits, 2)
+        self.assertIsNone(get_active_pool())
+
+    def test_nested_factories(self):
+        with artifact_pool() as pool:
+            artifact_cat()
+            metadata1()
+        self.assertEqual(pool.imports, 2)
+        self.assertEqual(pool.hits, 1)
+
+    def test_persisted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with artifact_pool(tmp) as pool:
+                original = single_int1_1()
+            self.assertEqual(pool.imports, 1)
+            self.assertEqual(os.listdir(tmp),
+                             [factory_key(single_int1_1) + '.qza'])
+
+            with artifact_pool(tmp) as pool:
+                loaded = single_int1_1()
+            self.assertEqual(pool.imports, 0)
+            self.assertEqual(pool.loads, 1)
+            self.assertEqual(loaded.uuid, original.uuid)
+
+    def test_shared_views(self):
+        with artifact_pool() as pool:
+            first = pool.view(single_int1_1, SingleIntFormat)
+            self.assertIs(pool.view(single_int1_1, SingleIntFormat), first)
+            pool.view(single_int1_2, SingleIntFormat)
+        self.assertEqual(pool.view_hits, 1)
+        self.assertEqual(pool.imports, 2)
+
+    def test_prepare(self):
+        pool = ArtifactPool()
+        pool.prepare()
+        self.assertEqual(pool.imports, len(POOLED_FACTORIES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import json
+import unittest
+
+from q2_mystery_stew.profiling import (PhaseReport, measure,
+                                       collect_example_timings,
+                                       report_example_timings)
+
+
+class TestPhaseReport(unittest.TestCase):
+    def test_phases_accumulate(self):
+        report = PhaseReport()
+        for _ in range(3):
+            with report.phase('a'):
+                [object() for _ in range(10)]
+        with report.phase('b'):
+            pass
+
+        obs = report.to_dict()
+        self.assertEqual(list(obs), ['a', 'b'])
+        self.assertEqual(obs['a']['calls'], 3)
+        self.assertEqual(obs['b']['calls'], 1)
+        self.assertGreaterEqual(obs['a']['wall_time'], 0)
+        self.assertIn('allocated_blocks', obs['a'])
+        self.assertEqual(json.loads(report.to_json()), obs)
+
+    def test_merge(self):
+        report = PhaseReport()
+        report.add('a', {'calls': 1, 'wall_time': 0.5})
+        report.merge({'a': {'calls': 2, 'wall_time': 1.0},
+                      'b': {'calls': 1, 'wall_time': 0.25}})
+
+        self.assertEqual(report.to_dict(),
+                         {'a': {'calls': 3, 'wall_time': 1.5},
+                          'b': {'calls': 1, 'wall_time': 0.25}})
+
+    def test_measure_without_report(self):
+        with measure(None, 'nothing'):
+            pass
+
+
+class TestExampleTimings(unittest.TestCase):
+    def test_collector(self):
+        with collect_example_timings() as timings:
+            report_example_timings('a', {'action': 1.0, 'assert': 0.5})
+            report_example_timings('b', {'action': 2.0})
+        report_example_timings('c', {'action': 4.0})
+
+        self.assertEqual([r['action'] for r in timings.records], ['a', 'b'])
+        self.assertEqual(timings.totals(), {'action': 3.0, 'assert': 0.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import tempfile
+import unittest
+
+from q2_mystery_stew.__main__ import main
+from q2_mystery_stew.runner import (run_examples, action_timings,
+                                    cache_timings)
+
+
+class TestRunner(unittest.TestCase):
+    def test_serial_and_sharded_match(self):
+        serial = run_examples(workers=1, ints=True, artifacts=True)
+        sharded = run_examples(workers=2, ints=True, artifacts=True)
+
+        self.assertEqual(serial['failed'], 0)
+        self.assertEqual(sharded['failed'], 0)
+        self.assertEqual(
+            [(r['action'], r['example']) for r in serial['examples']],
+            [(r['action'], r['example']) for r in sharded['examples']])
+        self.assertEqual(sharded['passed'], len(sharded['examples']))
+        for result in sharded['examples']:
+            self.assertEqual(set(result['phases']),
+                             {'materialize', 'action', 'assert'})
+
+    def test_cache_mode(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, 'cache')
+            report = run_examples(cache_dir=cache_dir, outputs=True)
+
+        self.assertEqual(report['failed'], 0,
+                         [r['error'] for r in report['examples']])
+        families = cache_timings(report)
+        self.assertEqual(list(families), ['multiple_outputs'])
+        self.assertEqual(families['multiple_outputs']['examples'], 5)
+        # one insert per output of multiple_outputs_1 through _5
+        self.assertEqual(families['multiple_outputs']['inserts'], 15)
+        self.assertEqual(families['multiple_outputs']['pool_loads'], 15)
+        for name in ('insert', 'lookup', 'first_run', 'pool_load'):
+            self.assertGreater(families['multiple_outputs'][name], 0)
+        # only pipelines recycle their pooled steps
+        self.assertNotIn('recycled_run', families['multiple_outputs'])
+
+    def test_cache_mode_pipelines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_dir = os.path.join(tmp, 'cache')
+            report = run_examples(cache_dir=cache_dir, pipelines=True,
+                                  pipeline_shapes=[(1, 1)])
+
+        self.assertEqual(report['failed'], 0,
+                         [r['error'] for r in report['examples']])
+        families = cache_timings(report)
+        self.assertGreater(families['pipeline_1x1']['recycled_run'], 0)
+        self.assertNotIn('recycled_run', families['echo_seed'])
+
+    def test_select(self):
+        report = run_examples(select=lambda examples: examples[:3],
+                              bools=True)
+        self.assertEqual(len(report['examples']), 3)
+        self.assertEqual(report['redundancy']['examples'], 3)
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_action_timings(self):
+        report = {'examples': [
+            {'action': 'a_1', 'family': 'a', 'status': 'passed',
+             'duration': 1.0},
+            {'action': 'a_1', 'family': 'a', 'status': 'failed',
+             'duration': 3.0},
+            {'action': 'b', 'family': 'b', 'status': 'passed',
+             'duration': 0.5}]}
+
+        self.assertEqual(action_timings(report), {
+            'a_1': {'family': 'a', 'examples': 2, 'failed': 1, 'total': 4.0,
+                    'max': 3.0, 'phases': {}},
+            'b': {'family': 'b', 'examples': 1, 'failed': 0, 'total': 0.5,
+                  'max': 0.5, 'phases': {}}})
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            self.assertEqual(main(['--bools', '--output', path]), 0)
+            with open(path) as fh:
+                report = json.load(fh)
+
+        self.assertEqual(report['filters'], ['bools'])
+        self.assertEqual(report['failed'], 0)
+        self.assertIn('bool_params_1', report['actions'])
+
+    def test_pipeline_shape(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            self.assertEqual(main(['--pipelines', '--pipeline-shape', '2x3',
+                                   '--output', path]), 0)
+            with open(path) as fh:
+                report = json.load(fh)
+
+        self.assertEqual(list(report['actions']), ['pipeline_2x3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import tempfile
+import unittest
+
+from q2_mystery_stew.__main__ import main
+from q2_mystery_stew.generators import generate_action_templates
+from q2_mystery_stew.plugin_setup import create_plugin
+from q2_mystery_stew.runner import run_examples
+from q2_mystery_stew.sampling import (BudgetSampler, estimate_costs,
+                                      load_history, sample_examples)
+
+EXAMPLES = [(f'{category}_{idx}', 'example_0')
+            for category in ('ints', 'bools', 'floats')
+            for idx in range(10)]
+CATEGORIES = {action_id: action_id.split('_')[0]
+              for action_id, _ in EXAMPLES}
+
+
+class TestSampling(unittest.TestCase):
+    def test_estimate_costs(self):
+        examples = [('ints_0', 'e'), ('ints_1', 'e'), ('bools_0', 'e')]
+        self.assertEqual(
+            estimate_costs(examples, CATEGORIES, {'ints_0': 2.0,
+                                                  'floats_0': 4.0}),
+            [2.0, 2.0, 3.0])
+        self.assertEqual(estimate_costs(examples, CATEGORIES, {}),
+                         [1.0, 1.0, 1.0])
+
+    def test_fits_budget(self):
+        costs = {action_id: 1.0 for action_id in CATEGORIES}
+        costs['ints_3'] = 100.0
+        selected, estimates, _, _ = sample_examples(
+            EXAMPLES, CATEGORIES, costs, budget=9.5, margin=0)
+        self.assertEqual(len(selected), 9)
+        self.assertNotIn(('ints_3', 'example_0'), selected)
+        self.assertLessEqual(sum(estimates), 9.5)
+        self.assertEqual(selected, sorted(selected, key=EXAMPLES.index))
+
+    def test_margin_and_overhead(self):
+        selected, _, _, _ = sample_examples(EXAMPLES, CATEGORIES, {},
+                                            budget=10)
+        self.assertEqual(len(selected), 9)
+
+        selected, _, _, remaining = sample_examples(
+            EXAMPLES, CATEGORIES, {}, budget=10, overhead=4, margin=0)
+        self.assertEqual(len(selected), 6)
+        self.assertEqual(remaining, [0.0])
+
+        with self.assertRaisesRegex(ValueError, 'overhead'):
+            sample_examples(EXAMPLES, CATEGORIES, {}, budget=4, overhead=4)
+
+    def test_stratified(self):
+        selected, _, _, _ = sample_examples(EXAMPLES, CATEGORIES, {},
+                                            budget=6, margin=0)
+        self.assertEqual(sorted(CATEGORIES[action_id]
+                                for action_id, _ in selected),
+                         ['bools'] * 2 + ['floats'] * 2 + ['ints'] * 2)
+
+    def test_seeded(self):
+        def sample(seed):
+            return sample_examples(EXAMPLES, CATEGORIES, {}, 6, seed=seed)[0]
+
+        self.assertEqual(sample(1), sample(1))
+        self.assertTrue(any(sample(seed) != sample(1) for seed in range(2, 6)))
+
+    def test_packed_per_worker(self):
+        examples = EXAMPLES[:3]
+        costs = {action_id: 3.0 for action_id, _ in examples}
+        # 9s of examples fit in two workers' 4.5s in total, but not on them
+        selected, _, assigned, remaining = sample_examples(
+            examples, CATEGORIES, costs, budget=4.5, workers=2, margin=0)
+        self.assertEqual(len(selected), 2)
+        self.assertEqual(sorted(assigned), [0, 1])
+        self.assertEqual(remaining, [1.5, 1.5])
+
+        selected, _, _, _ = sample_examples(EXAMPLES, CATEGORIES, {}, 5,
+                                            workers=2, margin=0)
+        self.assertEqual(len(selected), 10)
+
+    def test_plan_is_run(self):
+        categories = {}
+        sampler = BudgetSampler(6, categories, workers=2, margin=0)
+        report = run_examples(workers=2, select=sampler,
+                              shards=sampler.shards, categories=categories,
+                              bools=True, floats=True)
+        self.assertEqual(report['failed'], 0)
+
+        executed = [[], []]
+        for result in report['examples']:
+            executed[result['shard']].append(
+                (result['action'], result['example']))
+        self.assertEqual(executed, sampler.plan)
+        self.assertEqual(
+            [sum(estimate_costs(shard, categories, {}))
+             for shard in executed],
+            sampler.summary['estimated_loads'])
+        self.assertEqual(sampler.summary['estimated_loads'], [6.0, 6.0])
+
+        with self.assertRaisesRegex(ValueError, 'workers'):
+            sampler.shards(sum(sampler.plan, []), 3)
+
+    def test_sampler_summary(self):
+        sampler = BudgetSampler(5, CATEGORIES, overhead=1, seed=3, margin=0)
+        self.assertEqual(len(sampler(EXAMPLES)), 4)
+        self.assertEqual(sampler.summary['available'], 30)
+        self.assertEqual(sampler.summary['selected'], 4)
+        self.assertEqual(sampler.summary['estimated_cost'], 4.0)
+        self.assertEqual(sampler.summary['estimated_wall_time'], 5.0)
+        self.assertEqual(sampler.summary['estimated_loads'], [4.0])
+        self.assertEqual(len(sampler.plan[0]), 4)
+        self.assertEqual(sampler.summary['categories']['ints'],
+                         {'available': 10, 'selected': 1})
+
+        with self.assertRaisesRegex(ValueError, 'budget'):
+            BudgetSampler(0, CATEGORIES)
+        with self.assertRaisesRegex(ValueError, 'overhead'):
+            BudgetSampler(5, CATEGORIES, overhead=6)
+
+    def test_load_history(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            with open(path, 'w') as fh:
+                json.dump({'workers': 2, 'setup_time': 1.0, 'wall_time': 5.0,
+                           'actions': {
+                               'ints_0': {'examples': 4, 'total': 2.0},
+                               'ints_1': {'examples': 0, 'total': 0.0}}}, fh)
+            self.assertEqual(load_history(path), ({'ints_0': 0.5}, 5.0))
+
+            with open(path, 'w') as fh:
+                json.dump({'examples': [
+                    {'action': 'ints_0', 'duration': 1.0},
+                    {'action': 'ints_0', 'duration': 3.0}]}, fh)
+            self.assertEqual(load_history(path), ({'ints_0': 2.0}, 0.0))
+
+    def test_categories(self):
+        templates = generate_action_templates(ints=True, collections=True,
+                                              pipelines=True)
+        categories = {t.action_id: t.category for t in templates}
+        self.assertEqual(categories['int_params_1'], 'ints')
+        self.assertEqual(categories['list_int_params_1'], 'collections')
+        self.assertEqual(categories['pipeline_1x1'], 'pipelines')
+        self.assertEqual(categories['echo_seed'], 'pipelines')
+
+        filled = {}
+        create_plugin(categories=filled, ints=True, collections=True,
+                      pipelines=True)
+        self.assertEqual(filled, categories)
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            self.assertEqual(main(['--bools', '--floats', '--budget', '4',
+                                   '--seed', '7', '--margin', '0',
+                                   '--output', path]), 0)
+            with open(path) as fh:
+                report = json.load(fh)
+
+        sample = report['sample']
+        self.assertEqual(sample['selected'], 4)
+        self.assertEqual(sample['categories']['bools']['selected'], 2)
+        self.assertEqual(sample['categories']['floats']['selected'], 2)
+        self.assertEqual(report['passed'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
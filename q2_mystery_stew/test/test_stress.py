@@ -0,0 +1,87 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import os
+import json
+import tempfile
+import unittest
+
+from q2_mystery_stew import stress
+from q2_mystery_stew.pool import activate_pool, get_active_pool
+from q2_mystery_stew.profiling import collect_example_timings
+from q2_mystery_stew.stress import main, percentile, stress_action
+
+
+class TestStress(unittest.TestCase):
+    def test_percentile(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 95), 5)
+        self.assertEqual(percentile(values, 0), 1)
+        self.assertEqual(percentile(list(range(1, 101)), 99), 99)
+
+    def test_stress_action(self):
+        report = stress_action('multiple_outputs_2', threads=(2, 1),
+                               processes=(1, 2), calls=2, outputs=True)
+
+        self.assertEqual(
+            [(level['processes'], level['threads'])
+             for level in report['levels']],
+            [(1, 1), (1, 2), (2, 1), (2, 2)])
+        for level in report['levels']:
+            self.assertEqual(level['calls'], level['concurrency'] * 2)
+            self.assertEqual(level['errors'], 0, level['first_error'])
+            self.assertEqual(level['latency']['repeat'], level['calls'])
+            self.assertGreater(level['throughput'], 0)
+
+    def test_latency_is_action_phase(self):
+        stress._init_worker({'outputs': True}, 'multiple_outputs_2', None)
+        try:
+            with collect_example_timings() as timings:
+                latencies, errors = stress._run_threads(
+                    'multiple_outputs_2', None, threads=3, calls=2)
+        finally:
+            activate_pool(None)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            sorted(latencies),
+            sorted(record['phases']['action']
+                   for record in timings.records))
+
+    def test_worker_warms_up(self):
+        stress._init_worker({'artifacts': True}, 'artifact_params_1', None)
+        try:
+            self.assertGreater(get_active_pool().imports, 0)
+        finally:
+            activate_pool(None)
+
+        # the lazy action has been built in the worker
+        action = stress._plugin.methods['artifact_params_1']
+        self.assertIn('signature', vars(action))
+
+    def test_unknown_action(self):
+        with self.assertRaisesRegex(ValueError, 'not_an_action'):
+            stress_action('not_an_action', threads=(1,), calls=1, bools=True)
+
+    def test_main_stress_filter(self):
+        # wide outputs are only built when their opt-in filter is given
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'report.json')
+            self.assertEqual(main(['wide_outputs_50', '--wide-outputs',
+                                   '--threads', '1', '--calls', '1',
+                                   '--output', path]), 0)
+            with open(path) as fh:
+                report = json.load(fh)
+
+        self.assertEqual(report['action'], 'wide_outputs_50')
+        self.assertEqual(report['levels'][0]['errors'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
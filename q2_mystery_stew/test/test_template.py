@@ -0,0 +1,89 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import json
+import unittest
+from inspect import Parameter
+
+from qiime2.sdk import PluginManager, usage
+
+from q2_mystery_stew.plugin_setup import create_plugin
+from q2_mystery_stew.template import (get_disguised_echo_function,
+                                      metadata_digest, argument_to_line,
+                                      arguments_to_index)
+from q2_mystery_stew.generators.metadata import metadata1, metadata2
+from q2_mystery_stew.type import EchoOutput
+
+
+class TestDigestEcho(unittest.TestCase):
+    def test_metadata_digest(self):
+        self.assertEqual(metadata_digest(metadata1()),
+                         metadata_digest(metadata1()))
+        self.assertNotEqual(metadata_digest(metadata1())['digest'],
+                            metadata_digest(metadata2())['digest'])
+        self.assertEqual(metadata_digest(metadata1())['shape'], [3, 2])
+        self.assertEqual(
+            metadata_digest(metadata2().get_column('col3'))['shape'], [3])
+
+    def test_digest_line_is_small(self):
+        md = metadata1()
+        self.assertNotIn('"a"', argument_to_line('md', md, 'digest'))
+        self.assertIn('digest', argument_to_line('md', md, 'digest'))
+
+    def test_digest_examples(self):
+        plugin = create_plugin(echo_mode='digest', metadata=True)
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        for action in plugin.actions.values():
+            for example in action.examples.values():
+                example(usage.ExecutionUsage())
+
+    def test_bad_echo_mode(self):
+        with self.assertRaisesRegex(ValueError, 'echo_mode'):
+            create_plugin(echo_mode='partial')
+
+
+class TestIndexedEcho(unittest.TestCase):
+    def test_indexed_examples(self):
+        plugin = create_plugin(echo_format='indexed', ints=True,
+                               metadata=True, artifacts=True)
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        for action in plugin.actions.values():
+            for example in action.examples.values():
+                example(usage.ExecutionUsage())
+
+    def test_index_is_order_independent(self):
+        self.assertEqual(arguments_to_index({'a': 1, 'b': 'x'}),
+                         arguments_to_index({'b': 'x', 'a': 1}))
+        self.assertEqual(json.loads(arguments_to_index({'a': 1, 'b': 'x'})),
+                         {'a': [1, 'int'], 'b': ['x', 'str']})
+
+
+class TestEchoFunctions(unittest.TestCase):
+    def test_functions_are_not_shared(self):
+        outputs = [('only_output', EchoOutput)]
+        params_a = [Parameter('a', Parameter.POSITIONAL_OR_KEYWORD,
+                              annotation=int)]
+        params_b = [Parameter('b', Parameter.POSITIONAL_OR_KEYWORD,
+                              annotation=str)]
+
+        func_a = get_disguised_echo_function('action_a', params_a, outputs)
+        func_b = get_disguised_echo_function('action_b', params_b, outputs)
+
+        self.assertIsNot(func_a, func_b)
+        self.assertEqual(func_a.__name__, 'action_a')
+        self.assertEqual(list(func_a.__signature__.parameters), ['a'])
+        self.assertEqual(func_b.__name__, 'action_b')
+        self.assertEqual(list(func_b.__signature__.parameters), ['b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,11 +6,16 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
+import os
+import json
+
 import pytest
 
 from qiime2.sdk import PluginManager, usage
 
 from q2_mystery_stew.plugin_setup import create_plugin
+from q2_mystery_stew.pool import artifact_pool
+from q2_mystery_stew.profiling import collect_example_timings
 
 
 def get_tests():
@@ -24,6 +29,24 @@ def get_tests():
     return tests
 
 
+@pytest.fixture(scope='module', autouse=True)
+def shared_artifacts():
+    # Import each domain artifact once for every example in this module
+    with artifact_pool() as pool:
+        yield pool
+
+
+@pytest.fixture(scope='module', autouse=True)
+def example_timings():
+    # Set MYSTERY_STEW_TIMINGS to a path to save the per-phase timings
+    path = os.environ.get('MYSTERY_STEW_TIMINGS')
+    with collect_example_timings() as timings:
+        yield timings
+    if path:
+        with open(path, 'w') as fh:
+            json.dump(timings.records, fh, indent=2)
+
+
 def _labeler(val):
     if hasattr(val, 'id'):
         return val.id
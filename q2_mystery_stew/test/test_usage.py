@@ -0,0 +1,54 @@
+# ----------------------------------------------------------------------------
+# Copyright (c) 2020-2023, QIIME 2 development team.
+#
+# Distributed under the terms of the Modified BSD License.
+#
+# The full license is in the file LICENSE, distributed with this software.
+# ----------------------------------------------------------------------------
+
+import unittest
+from unittest import mock
+
+import qiime2
+from qiime2.sdk import PluginManager, usage
+
+from q2_mystery_stew.plugin_setup import create_plugin
+from q2_mystery_stew.usage import (UsageInstantiator,
+                                   COLLECTION_ASSERTION_LIMIT)
+
+
+class TestInputMaterialization(unittest.TestCase):
+    def test_each_input_imported_once(self):
+        plugin = create_plugin(artifacts=True, metadata=True)
+        pm = PluginManager(add_plugins=False)
+        pm.add_plugin(plugin)
+
+        import_data = qiime2.Artifact.import_data
+        cases = [('artifact_params_1', 'example_0', 1),
+                 ('metadata_params_1', 'example_2', 1),
+                 ('metadata_params_1', 'example_7', 2)]
+        for action_id, example, expected_imports in cases:
+            example_f = plugin.actions[action_id].examples[example]
+            with mock.patch('qiime2.Artifact.import_data',
+                            wraps=import_data) as patched:
+                example_f(usage.ExecutionUsage())
+            self.assertEqual(patched.call_count, expected_imports,
+                             (action_id, example))
+
+
+class TestCollectionAssertions(unittest.TestCase):
+    def test_assertions_are_bounded(self):
+        instantiator = UsageInstantiator('a', {}, {}, [],
+                                         collection_size=100_000)
+        keys = instantiator._collection_keys_to_assert()
+        self.assertEqual(len(keys), COLLECTION_ASSERTION_LIMIT)
+        self.assertEqual(keys[0], 42)
+        self.assertEqual(keys[-1], 42 + 100_000 - 1)
+
+        instantiator = UsageInstantiator('a', {}, {}, [], collection_size=3)
+        self.assertEqual(list(instantiator._collection_keys_to_assert()),
+                         [42, 43, 44])
+
+
+if __name__ == '__main__':
+    unittest.main()
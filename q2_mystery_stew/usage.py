@@ -6,27 +6,48 @@
 # The full license is in the file LICENSE, distributed with this software.
 # ----------------------------------------------------------------------------
 
+import os
 import re
+import json
+import time
+import tempfile
+import functools
 
 import qiime2
 from qiime2.sdk import ResultCollection, Result
 from qiime2.sdk.util import (is_semantic_type, is_metadata_type,
                              is_metadata_column_type)
-from qiime2.sdk.usage import COLLECTION_VAR_TYPES
+from qiime2.sdk.usage import COLLECTION_VAR_TYPES, ExecutionUsageVariable
 
+from q2_mystery_stew.format import EchoOutputFmt
+from q2_mystery_stew.pool import get_active_pool
+from q2_mystery_stew.profiling import report_example_timings
 from q2_mystery_stew.template import (
-    argument_to_line, OUTPUT_COLLECTION_START, OUTPUT_COLLECTION_END)
+    argument_to_line, arguments_to_index, output_collection_keys,
+    asset_name, asset_line, OUTPUT_COLLECTION_SIZE)
+
+# Members of larger output collections are spot-checked rather than asserted
+# one by one
+COLLECTION_ASSERTION_LIMIT = 32
 
 
 class UsageInstantiator:
-    def __init__(self, id, parameter_specs, arguments, expected_outputs):
+    def __init__(self, id, parameter_specs, arguments, expected_outputs,
+                 collection_size=OUTPUT_COLLECTION_SIZE, echo_mode='full',
+                 echo_format='lines'):
         self.id = id
         self.parameter_specs = parameter_specs
         self.arguments = arguments
         self.expected_outputs = expected_outputs
         self.output_names = {k: k for k, _ in self.expected_outputs}
+        self.collection_size = collection_size
+        self.echo_mode = echo_mode
+        self.echo_format = echo_format
 
     def __call__(self, use):
+        phases = {}
+        start = time.perf_counter()
+
         inputs = {}
         realized_arguments = {}
 
@@ -42,6 +63,39 @@ class UsageInstantiator:
                 memoized_vars[name] = use_method(*args)
             return memoized_vars[name]
 
+        # Each input is materialized once per example, and that same object
+        # is used for the expected values and handed to the usage driver
+        materialized = {}
+        once_factories = {}
+
+        def once(factory):
+            if factory not in once_factories:
+                @functools.wraps(factory)
+                def wrapper():
+                    if factory not in materialized:
+                        materialized[factory] = factory()
+                    return materialized[factory]
+                once_factories[factory] = wrapper
+            return once_factories[factory]
+
+        # Input collections may repeat the same factory many times, so each
+        # factory is only viewed once per example. With an active pool the
+        # views are also shared by every example with the same inputs.
+        realized_views = {}
+        pool = get_active_pool()
+
+        def realize(factory, view_type):
+            key = (factory, view_type)
+            if key not in realized_views:
+                if pool is not None:
+                    view = pool.view(factory, view_type)
+                else:
+                    artifact = once(factory)()
+                    view = artifact.view(view_type)
+                    view.__hide_from_garbage_collector = artifact
+                realized_views[key] = view
+            return realized_views[key]
+
         for name, argument in self.arguments.items():
             spec = self.parameter_specs[name]
 
@@ -56,10 +110,9 @@ class UsageInstantiator:
 
                     if collection_type == list:
                         for arg in argument:
-                            artifact = arg()
-                            view = artifact.view(spec.view_type)
-                            view.__hide_from_garbage_collector = artifact
-                            var = do(use.init_artifact, arg.__name__, arg)
+                            view = realize(arg, spec.view_type)
+                            var = do(use.init_artifact, arg.__name__,
+                                     once(arg))
 
                             realized_arguments[name].append(view)
                             inputs[name].append(var)
@@ -67,10 +120,7 @@ class UsageInstantiator:
                     # we know that if we're not a list, we'll be a dict
                     else:
                         for key, arg in argument.items():
-                            artifact = arg()
-                            view = artifact.view(spec.view_type)
-                            view.__hide_from_garbage_collector = artifact
-
+                            view = realize(arg, spec.view_type)
                             realized_arguments[name][key] = view
 
                         def _closure(argument):
@@ -82,7 +132,7 @@ class UsageInstantiator:
                                 _input = {}
                                 for k, v in argument.items():
                                     if callable(v):
-                                        v = v()
+                                        v = once(v)()
                                     _input[k] = v
                                 if all(isinstance(v, Result)
                                        for v in _input.values()):
@@ -97,10 +147,9 @@ class UsageInstantiator:
                         inputs[name] = var
 
                 else:
-                    artifact = argument()
-                    view = artifact.view(spec.view_type)
-                    view.__hide_from_garbage_collector = artifact
-                    var = do(use.init_artifact, argument.__name__, argument)
+                    view = realize(argument, spec.view_type)
+                    var = do(use.init_artifact, argument.__name__,
+                             once(argument))
 
                     realized_arguments[name] = view
                     inputs[name] = var
@@ -112,23 +161,23 @@ class UsageInstantiator:
                     factory, column_name = argument, None
 
                 if type(factory) is list:
-                    realized_factories = [f() for f in factory]
                     factories = factory
                 else:
-                    realized_factories = [factory()]
                     factories = [factory]
+                realized_factories = [once(f)() for f in factories]
 
                 md_vars = []
                 realized_mds = []
                 for md, factory in zip(realized_factories, factories):
                     if not isinstance(md, qiime2.Metadata):
-                        var = do(use.init_artifact, factory.__name__, factory)
+                        var = do(use.init_artifact, factory.__name__,
+                                 once(factory))
                         md_var = do(use.view_as_metadata,
                                     factory.__name__ + "_md", var)
                         md = md.view(qiime2.Metadata)
                     else:
                         md_var = do(use.init_metadata,
-                                    factory.__name__, factory)
+                                    factory.__name__, once(factory))
 
                     md_vars.append(md_var)
                     realized_mds.append(md)
@@ -160,6 +209,9 @@ class UsageInstantiator:
             if name not in realized_arguments:
                 realized_arguments[name] = spec.default
 
+        phases['materialize'] = time.perf_counter() - start
+        start = time.perf_counter()
+
         # no need to memoize, these outputs will not be used (only assertions)
         computed_results = use.action(
             use.UsageAction(plugin_id='mystery_stew', action_id=self.id),
@@ -167,13 +219,24 @@ class UsageInstantiator:
             use.UsageOutputNames(**self.output_names),
         )
 
+        phases['action'] = time.perf_counter() - start
+        start = time.perf_counter()
+
         for idx, (name, expected_type) in enumerate(self.expected_outputs):
             self._assert_output(computed_results, name, expected_type, idx,
                                 realized_arguments)
 
-    @staticmethod
-    def _fmt_regex(name, arg):
-        line = argument_to_line(name, arg).strip()
+        phases['assert'] = time.perf_counter() - start
+        self._measure_outputs(computed_results, phases)
+        report_example_timings(self.id, phases)
+
+    def _measure_outputs(self, computed_results, phases):
+        # Subclasses may time further work on the outputs into `phases`
+        pass
+
+    def _fmt_regex(self, name, arg):
+        # In 'digest' mode metadata is compared by digest and shape
+        line = argument_to_line(name, arg, self.echo_mode).strip()
         return re.escape(line)
 
     def _assert_output(self, computed_results, output_name, expected_type, idx,
@@ -190,15 +253,28 @@ class UsageInstantiator:
     def _assert_output_collection(self, output, idx, realized_arguments,
                                   expected_type):
         inner_type = expected_type.fields[0]
-        for i in range(OUTPUT_COLLECTION_START, OUTPUT_COLLECTION_END):
+        for i in self._collection_keys_to_assert():
             output.assert_output_type(semantic_type=inner_type, key=i)
             self._assert_output_single(
                 output, idx, realized_arguments, key=i,
                 expression=f"{idx}: {i}")
 
+    def _collection_keys_to_assert(self):
+        keys = output_collection_keys(self.collection_size)
+        if len(keys) <= COLLECTION_ASSERTION_LIMIT:
+            return keys
+
+        # Evenly spaced, always including the first and last members
+        last = len(keys) - 1
+        step = last / (COLLECTION_ASSERTION_LIMIT - 1)
+        return sorted({keys[round(i * step)]
+                       for i in range(COLLECTION_ASSERTION_LIMIT)})
+
     def _assert_output_single(self, output, idx, realized_arguments, key=None,
                               expression=None):
-        if idx == 0 and realized_arguments:
+        if idx == 0 and realized_arguments and self.echo_format == 'indexed':
+            self._assert_output_index(output, realized_arguments, key)
+        elif idx == 0 and realized_arguments:
             for name, arg in realized_arguments.items():
                 regex = self._fmt_regex(name, arg)
                 output.assert_has_line_matching(path='echo.txt',
@@ -211,3 +287,112 @@ class UsageInstantiator:
             output.assert_has_line_matching(path='echo.txt',
                                             expression=expression,
                                             key=key)
+
+    def _assert_output_index(self, output, realized_arguments, key=None):
+        expected = arguments_to_index(realized_arguments, self.echo_mode)
+
+        if not isinstance(output, ExecutionUsageVariable):
+            # Other drivers only see the assertion, so render it as a single
+            # match against the whole index
+            regex = '^%s$' % re.escape(expected.strip())
+            output.assert_has_line_matching(path='echo.txt', expression=regex,
+                                            key=key)
+            return
+
+        # Load the index once and check every argument against it
+        data = output.value[key] if key is not None else output.value
+        with data.view(EchoOutputFmt).open() as fh:
+            observed = json.load(fh)
+        expected = json.loads(expected)
+
+        mismatched = sorted(name for name in expected.keys() | observed.keys()
+                            if expected.get(name) != observed.get(name))
+        if mismatched:
+            raise AssertionError(
+                'Echoed arguments of %r did not match for: %s'
+                % (self.id, ', '.join(mismatched)))
+
+
+class PipelineUsageInstantiator(UsageInstantiator):
+    """Usage example of a pipeline built by get_pipeline_function
+
+    The final output is the echo of echo_fan_in_{width}, so it is checked
+    for the digest of each of the `width` joined branches. Any further
+    outputs are echo_work branches, which also echo their timestamps.
+    """
+    def __init__(self, *args, width, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.width = width
+
+    def _assert_output_single(self, output, idx, realized_arguments, key=None,
+                              expression=None):
+        digest = r'"[0-9a-f]{64}"'
+        if idx == 0 and self.width == 1:
+            entries = {'input': (digest, 'EchoOutputFmt')}
+        elif idx == 0:
+            entries = {f'input{i}': (digest, 'EchoOutputFmt')
+                       for i in range(1, self.width + 1)}
+        else:
+            duration = json.dumps(realized_arguments['duration'])
+            timestamp = r'[0-9.]+'
+            entries = {'input': (digest, 'EchoOutputFmt'),
+                       'duration': (re.escape(duration), 'float'),
+                       'started': (timestamp, 'float'),
+                       'finished': (timestamp, 'float')}
+
+        if self.echo_format == 'indexed':
+            index = ', '.join(r'"%s": \[%s, "%s"\]' % (name, value, type_)
+                              for name, (value, type_)
+                              in sorted(entries.items()))
+            expressions = [r'^\{%s\}$' % index]
+        else:
+            expressions = [r'^\["%s", %s, "%s"\]$' % (name, value, type_)
+                           for name, (value, type_) in entries.items()]
+
+        for expression in expressions:
+            output.assert_has_line_matching(path='echo.txt',
+                                            expression=expression, key=key)
+
+
+class VisualizerUsageInstantiator(UsageInstantiator):
+    """Usage example of a visualizer built by get_visualizer_function
+
+    The index is checked for the echoed arguments and the link to the last
+    asset, and the first and last assets for their first line. Under the
+    execution driver, writing the .qzv is timed as the 'save' phase.
+    """
+    def __init__(self, *args, num_assets, asset_size, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_assets = num_assets
+        self.asset_size = asset_size
+
+    def _assert_output_single(self, output, idx, realized_arguments, key=None,
+                              expression=None):
+        for name, arg in realized_arguments.items():
+            output.assert_has_line_matching(
+                path='index.html', expression=self._fmt_regex(name, arg))
+
+        if not self.num_assets:
+            return
+        last = asset_name(self.num_assets - 1)
+        output.assert_has_line_matching(
+            path='index.html', expression=re.escape('href="assets/%s"'
+                                                    % last))
+
+        if not self.asset_size:
+            return
+        for asset_idx in sorted({0, self.num_assets - 1}):
+            line = asset_line(realized_arguments['seed'], asset_idx).strip()
+            output.assert_has_line_matching(
+                path='assets/' + asset_name(asset_idx),
+                expression='^' + re.escape(line[:self.asset_size]))
+
+    def _measure_outputs(self, computed_results, phases):
+        output = computed_results[0]
+        if not isinstance(output, ExecutionUsageVariable):
+            return
+
+        with tempfile.TemporaryDirectory(prefix='mystery-stew-qzv-') as tmp:
+            start = time.perf_counter()
+            output.value.save(os.path.join(tmp, self.id + '.qzv'))
+            phases['save'] = time.perf_counter() - start